@@ -0,0 +1,187 @@
+import argparse
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import List, Optional, Tuple
+
+from panda3d.core import (
+    Filename,
+    Loader,
+    LoaderOptions,
+    Multifile,
+    NodePath,
+    SamplerState,
+    Texture,
+    TexturePool,
+)
+
+from utils.assets import BAKED_MULTIFILE, MUSIC, SKYBOX, baked_name
+
+MODELS = "assets/models/*.bam"
+TEXTURES = "assets/**/*.png"
+COMPRESSION_LEVEL = 6
+
+
+def bake_texture(
+    texture: Texture, destination: Path, compress: bool, mipmaps: bool
+) -> Path:
+    if mipmaps:
+        texture.set_minfilter(SamplerState.FT_linear_mipmap_linear)
+        texture.generate_ram_mipmap_images()
+    if compress:
+        mode = Texture.CM_dxt5 if texture.get_num_components() == 4 else Texture.CM_dxt1
+        if not texture.compress_ram_image(mode):
+            print(f"could not compress {texture.get_name()}, storing it uncompressed")
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    if not texture.write(Filename.from_os_specific(str(destination))):
+        raise OSError(f"Failed to write {destination}")
+    return destination
+
+
+def bake_model(path: Path, destination: Path, staging: Path) -> Path:
+    model = NodePath(
+        Loader.get_global_ptr().load_sync(
+            Filename.from_os_specific(str(path)),
+            LoaderOptions(LoaderOptions.LF_no_cache),
+        )
+    )
+    root = Path().resolve()
+    for texture in model.find_all_textures():
+        if not texture.has_fullpath():
+            continue
+        source = Path(texture.get_fullpath().to_os_specific()).resolve()
+        if source.suffix != ".png":
+            continue
+        baked = Filename.from_os_specific(
+            str(staging / baked_name(source.relative_to(root).as_posix()))
+        )
+        texture.set_filename(baked)
+        texture.set_fullpath(baked)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    if not model.write_bam_file(Filename.from_os_specific(str(destination))):
+        raise OSError(f"Failed to write {destination}")
+    return destination
+
+
+def encode_music(source: Path, destination: Path, quality: int) -> Optional[Path]:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    if shutil.which("ffmpeg"):
+        command = [
+            "ffmpeg",
+            "-loglevel",
+            "error",
+            "-y",
+            "-i",
+            str(source),
+            "-c:a",
+            "libvorbis",
+            "-q:a",
+            str(quality),
+            str(destination),
+        ]
+    elif shutil.which("oggenc"):
+        command = [
+            "oggenc",
+            "-Q",
+            "-q",
+            str(quality),
+            "-o",
+            str(destination),
+            str(source),
+        ]
+    else:
+        print(f"ffmpeg or oggenc not found, {source} will be loaded uncompressed")
+        return None
+    subprocess.run(command, check=True)
+    return destination
+
+
+def bake(
+    output: Path, compress: bool, mipmaps: bool, music_quality: int
+) -> List[Tuple[str, int, int]]:
+    skybox_faces = sorted(Path().glob(SKYBOX.replace("#", "*")))
+    textures = [
+        path for path in sorted(Path().glob(TEXTURES)) if path not in skybox_faces
+    ]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as staging:
+        staging = Path(staging)
+        baked: List[Tuple[str, Path, int, int]] = []
+
+        for path in textures:
+            name = baked_name(path.as_posix())
+            texture = TexturePool.load_texture(Filename.from_os_specific(str(path)))
+            bake_texture(texture, staging / name, compress, mipmaps)
+            baked.append((name, staging / name, path.stat().st_size, COMPRESSION_LEVEL))
+        if skybox_faces:
+            cube_map = TexturePool.load_cube_map(SKYBOX)
+            bake_texture(cube_map, staging / baked_name(SKYBOX), compress, mipmaps)
+            baked.append(
+                (
+                    baked_name(SKYBOX),
+                    staging / baked_name(SKYBOX),
+                    sum(face.stat().st_size for face in skybox_faces),
+                    COMPRESSION_LEVEL,
+                )
+            )
+        for path in sorted(Path().glob(MODELS)):
+            name = path.as_posix()
+            bake_model(path, staging / name, staging)
+            baked.append((name, staging / name, path.stat().st_size, COMPRESSION_LEVEL))
+        music = Path(MUSIC)
+        if music.exists():
+            encoded = encode_music(music, staging / baked_name(MUSIC), music_quality)
+            if encoded is not None:
+                baked.append((baked_name(MUSIC), encoded, music.stat().st_size, 0))
+        else:
+            print(f"{music} not found, skipping music")
+
+        output.unlink(missing_ok=True)
+        multifile = Multifile()
+        if not multifile.open_write(Filename.binary_filename(str(output))):
+            raise OSError(f"Failed to open {output}")
+        for name, path, source_size, compression_level in baked:
+            multifile.add_subfile(
+                name, Filename.binary_filename(str(path)), compression_level
+            )
+        multifile.flush()
+        for name, _, source_size, _ in baked:
+            index = multifile.find_subfile(name)
+            rows.append(
+                (name, source_size, multifile.get_subfile_internal_length(index))
+            )
+        multifile.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Bake textures, models and music into a multifile for faster loading."
+    )
+    parser.add_argument("--output", type=Path, default=BAKED_MULTIFILE)
+    parser.add_argument(
+        "--uncompressed",
+        action="store_true",
+        help="keep texture pixels uncompressed instead of DXT",
+    )
+    parser.add_argument("--no-mipmaps", action="store_true")
+    parser.add_argument("--music-quality", type=int, default=4)
+    args = parser.parse_args()
+
+    start = perf_counter()
+    rows = bake(
+        args.output, not args.uncompressed, not args.no_mipmaps, args.music_quality
+    )
+    for name, source_size, baked_size in rows:
+        print(f"{name:<44}{source_size:>10}{baked_size:>10}")
+    print(
+        f"{len(rows)} assets, {sum(row[1] for row in rows)} -> "
+        f"{args.output.stat().st_size} bytes in {perf_counter() - start:.2f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+from direct.showbase.ShowBase import ShowBase
+from panda3d.core import loadPrcFileData
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def headless_base() -> ShowBase:
+    loadPrcFileData(
+        "",
+        f"""
+        window-type none
+        audio-library-name null
+        model-path {ROOT}
+        """,
+    )
+    return ShowBase()
+
+
+def measure(func: Callable[[], None], repeat: int, rounds: int = 5) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (perf_counter() - start) / repeat)
+    return best
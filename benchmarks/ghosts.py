@@ -0,0 +1,61 @@
+import argparse
+
+from benchmarks.common import headless_base, measure
+from utils.difficulty import Difficulty
+from utils.ghosts import GhostRiders
+from utils.track_generation import Track, TrackList
+from utils.track_geometry import track_geometry
+
+RIDER_COUNTS = (1, 10, 100, 300, 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-frame cost of batched ghost riders against one node per rider."
+    )
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--riders", type=int, nargs="+", default=RIDER_COUNTS)
+    args = parser.parse_args()
+
+    base = headless_base()
+    tracks = TrackList(maxlen=100)
+    tracks.extend(TrackList.from_geometry(track_geometry(100, 0, 3, 0), [None] * 100))
+
+    print(f"{'riders':>7}{'batched':>13}{'per node':>13}{'per rider':>13}")
+    for count in args.riders:
+        ghosts = GhostRiders(base.render)
+        for i in range(count):
+            ghosts.add(Difficulty(speed=5 + i % 10))
+
+        def batched():
+            ghosts.step(1)
+            ghosts.update(tracks)
+
+        nodes = [base.render.attachNewNode("rider") for _ in range(count)]
+
+        def per_node():
+            ghosts.step(1)
+            for node, distance in zip(nodes, ghosts.distance.tolist()):
+                index = min(int(distance // Track.LENGTH), tracks.next_index - 1)
+                track = tracks[index]
+                node.set_pos(
+                    track.start_pos
+                    + track.direction * (distance - index * Track.LENGTH)
+                )
+
+        batched_seconds = measure(batched, args.repeat)
+        ghosts.clear()
+        for i in range(count):
+            ghosts.add(Difficulty(speed=5 + i % 10))
+        per_node_seconds = measure(per_node, args.repeat)
+        print(
+            f"{count:>7}{batched_seconds * 1e6:>10.1f} us{per_node_seconds * 1e6:>10.1f} us"
+            f"{batched_seconds / count * 1e9:>10.0f} ns"
+        )
+        ghosts.node_path.remove_node()
+        for node in nodes:
+            node.remove_node()
+
+
+if __name__ == "__main__":
+    main()
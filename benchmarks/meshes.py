@@ -0,0 +1,65 @@
+import argparse
+
+from panda3d.core import Point3F
+
+from benchmarks.common import headless_base, measure
+from utils.mesh_builder import mesh_size_bytes, mesh_vertex_count
+from utils.track_generation import COLLECTION_LENGTHS, TrackCollectionGenerator
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare batched model copies with procedural collection meshes."
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--heading", type=int, default=90)
+    args = parser.parse_args()
+
+    base = headless_base()
+    generators = {
+        "model": TrackCollectionGenerator(
+            base.render, base.loader, batch_collections=True
+        ),
+        "mesh": TrackCollectionGenerator(
+            base.render, base.loader, procedural_mesh=True
+        ),
+    }
+    start_pos = Point3F(0, -10, 5)
+
+    print(
+        f"{'collection':<12}{'mode':<7}{'segments':>9}{'nodes':>7}"
+        f"{'vertices':>10}{'bytes':>10}{'build':>13}"
+    )
+    for collection, lengths in COLLECTION_LENGTHS.items():
+        num_tracks = lengths[0]
+        for mode, generator in generators.items():
+
+            def generate():
+                track_list = generator._generate_collection(
+                    collection, start_pos, args.heading, num_tracks
+                )
+                if not generator.procedural_mesh:
+                    generator._batch(track_list)
+                return track_list
+
+            track_list = generate()
+            batch_node = track_list.head.node_path
+            row = (
+                len(track_list),
+                batch_node.countNumDescendants() + 1,
+                mesh_vertex_count(batch_node),
+                mesh_size_bytes(batch_node),
+            )
+            track_list.clear()
+            seconds = measure(lambda: generate().clear(), args.repeat)
+            print(
+                f"{collection:<12}{mode:<7}"
+                + "".join(
+                    f"{value:>{width}}" for value, width in zip(row, (9, 7, 10, 10))
+                )
+                + f"{seconds * 1e6:>10.0f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+import argparse
+import json
+import platform
+import sys
+from functools import partial
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict
+
+import numpy as np
+from panda3d.core import ClockObject, NodePath, PandaSystem, Point3F, Vec3
+
+from benchmarks.common import measure
+from main import Game
+from utils.quality import QualityGovernor
+from utils.simulation import Simulation
+from utils.spatial_hash import SpatialHash
+from utils.track_generation import TrackList
+from utils.track_geometry import TrackGeometry, track_geometry
+from utils.visibility import TrackVisibility
+
+GENERATORS = ("straight", "ramp_up", "ramp_down", "turn_left", "turn_right", "loop")
+TRACK_LIST_SIZES = (100, 1_000, 10_000, 100_000)
+RETAINED_TRACK_SIZES = (Game.RETAINED_TRACKS, 1_000, 5_000)
+REGRESSION_THRESHOLD = 1.25
+
+
+def bench_generation(game: Game, repeat: int) -> Dict[str, float]:
+    results = {}
+    for collection in GENERATORS:
+        generate = game.track_collections[collection]
+        num_tracks = []
+
+        def place():
+            track_list = generate(
+                start_pos=Point3F(0, -10, 5), initial_heading=game.rng.choice((0, 90))
+            )
+            num_tracks.append(len(track_list))
+            track_list.clear()
+
+        seconds = measure(place, repeat)
+        results[f"generate.{collection}"] = seconds / np.mean(num_tracks)
+    return results
+
+
+def bench_prepared(game: Game, repeat: int) -> Dict[str, float]:
+    generator = game.track_generator
+    results = {}
+    for collection in GENERATORS:
+        best = float("inf")
+        for _ in range(repeat):
+            prepared = generator.prepare(
+                collection,
+                Point3F(0, -10, 5),
+                0,
+                generator.collection_length(collection),
+            )
+            generator.build_prepared(
+                prepared, len(prepared.geometry.result().start_pos)
+            )
+            start = perf_counter()
+            track_list = generator.finish_prepared(prepared)
+            best = min(best, (perf_counter() - start) / len(track_list))
+            track_list.clear()
+        results[f"finish_prepared.{collection}"] = best
+    return results
+
+
+def bench_node_pool(game: Game, repeat: int) -> Dict[str, float]:
+    pool = game.track_generator.node_pool
+
+    def create():
+        pool.factory().removeNode()
+
+    def recycle():
+        pool.release(pool.acquire(game.render))
+
+    pool.release(pool.acquire(game.render))
+    return {
+        "node_pool.miss": measure(create, repeat),
+        "node_pool.hit": measure(recycle, repeat),
+    }
+
+
+def bench_track_list(repeat: int) -> Dict[str, float]:
+    results = {}
+    for size in TRACK_LIST_SIZES:
+        track_list = TrackList(maxlen=size)
+        start_pos = Point3F(0, 0, 0)
+        direction = Vec3(0, 1, 0)
+        normal = Vec3(0, 0, 1)
+        for _ in range(size):
+            track_list.append(start_pos, direction, normal)
+
+        geometry = track_geometry(42, 0, 0, 0)
+        collections = iter(
+            [TrackList.from_geometry(geometry, [None] * 42) for _ in range(repeat * 5)]
+        )
+
+        append = measure(
+            partial(track_list.append, start_pos, direction, normal), repeat
+        )
+        results[f"track_list.append.{size}"] = append
+        results[f"track_list.extend.{size}"] = (
+            measure(lambda: track_list.extend(next(collections)), repeat) / 42
+        )
+        results[f"track_list.popleft.{size}"] = measure_popleft(track_list, geometry)
+    return results
+
+
+def bench_visibility(repeat: int) -> Dict[str, float]:
+    results = {}
+    root = NodePath("visibility_root")
+    for size in TRACK_LIST_SIZES:
+        track_list = TrackList(maxlen=size)
+        for _ in range(size):
+            track_list.append(
+                Point3F(0, 0, 0), Vec3(0, 1, 0), Vec3(0, 0, 1), root.attachNewNode("")
+            )
+        visibility = TrackVisibility(track_list)
+        indices = iter(range(track_list.first_index, track_list.next_index))
+        visibility.update(next(indices))
+        results[f"visibility.update.{size}"] = measure(
+            lambda: visibility.update(next(indices)), min(repeat, size // 10)
+        )
+        track_list.clear()
+    return results
+
+
+def bench_spatial_hash(repeat: int) -> Dict[str, float]:
+    results = {}
+    for size in TRACK_LIST_SIZES:
+        track_list = TrackList(maxlen=size, spatial_index=SpatialHash())
+        geometry = track_geometry(size, 0, 0, 0)
+        track_list.extend(TrackList.from_geometry(geometry, [None] * size))
+        middle = Point3F(*geometry.start_pos[size // 2]) + Vec3(0.5, 0, 0)
+        loop = track_geometry(40, 10, 1, 90, is_loop=True, start_pos=middle)
+
+        results[f"spatial_hash.nearest.{size}"] = measure(
+            lambda: track_list.nearest(middle), repeat
+        )
+        results[f"spatial_hash.overlaps.{size}"] = measure(
+            lambda: track_list.overlaps(
+                loop.start_pos, loop.end_pos, 1.5, 0, track_list.next_index
+            ),
+            repeat,
+        )
+    return results
+
+
+def bench_quality_governor(repeat: int) -> Dict[str, float]:
+    governor = QualityGovernor(lambda tier: None)
+    frame_times = iter(np.tile([1 / 120, 1 / 30], repeat * 5))
+    clock = iter(np.arange(repeat * 10) / 60)
+
+    seconds = measure(lambda: governor.record(next(frame_times), next(clock)), repeat)
+    print(
+        f"quality governor: {len(governor.changes)} tier changes, "
+        f"settled on {governor.tier.name}",
+        file=sys.stderr,
+    )
+    return {"quality_governor.record": seconds}
+
+
+def measure_popleft(track_list: TrackList, geometry: TrackGeometry) -> float:
+    best = float("inf")
+    for _ in range(5):
+        while len(track_list) < track_list.maxlen:
+            track_list.extend(
+                TrackList.from_geometry(geometry, [None] * len(geometry.start_pos))
+            )
+        start = perf_counter()
+        for _ in range(len(track_list)):
+            track_list.popleft()
+        best = min(best, (perf_counter() - start) / track_list.maxlen)
+    return best
+
+
+def bench_move_player(game: Game, repeat: int) -> Dict[str, float]:
+    clock = ClockObject.getGlobalClock()
+    clock.setMode(ClockObject.MNonRealTime)
+    clock.setFrameRate(Simulation.STEP_RATE)
+
+    results = {}
+    for size in RETAINED_TRACK_SIZES:
+        game.retained_tracks = size
+        best = float("inf")
+        for _ in range(5):
+            game.start_game()
+            while len(game.tracks) < size:
+                game.tracks.extend(
+                    game.track_generator.generate_collection(
+                        "straight",
+                        start_pos=game.tracks.tail.end_pos,
+                        initial_heading=game.track_heading,
+                        num_tracks=min(20, size - len(game.tracks)),
+                    )
+                )
+            game.move_player_task(None)
+            start = perf_counter()
+            for _ in range(repeat):
+                game.move_player_task(None)
+            best = min(best, (perf_counter() - start) / repeat)
+            game.die("Benchmark finished")
+        results[f"move_player_task.{size}"] = best
+    game.retained_tracks = Game.RETAINED_TRACKS
+    return results
+
+
+def bench_die(game: Game, repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    restarts = []
+    for _ in range(repeat):
+        start = perf_counter()
+        game.start_game()
+        restarts.append(perf_counter() - start)
+        while game.tracks.maxlen - len(game.tracks) > 42:
+            game.currently_active_collections = {"loop"}
+            game.place_track("loop")
+        start = perf_counter()
+        game.die("Benchmark finished")
+        best = min(best, perf_counter() - start)
+    return {"die": best, "start_game": float(np.median(restarts))}
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float]) -> bool:
+    ok = True
+    print(f"{'benchmark':<32}{'baseline':>14}{'current':>14}{'ratio':>9}")
+    for name, seconds in results.items():
+        if name not in baseline:
+            print(f"{name:<32}{'-':>14}{seconds * 1e6:>11.2f} us")
+            continue
+        ratio = seconds / baseline[name]
+        regressed = ratio > REGRESSION_THRESHOLD
+        ok = ok and not regressed
+        print(
+            f"{name:<32}{baseline[name] * 1e6:>11.2f} us{seconds * 1e6:>11.2f} us"
+            f"{ratio:>8.2f}x{'  REGRESSION' if regressed else ''}"
+        )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark track generation, TrackList and the frame update."
+    )
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", type=Path, default=Path("bench_output.json"))
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--save-baseline", type=Path)
+    args = parser.parse_args()
+
+    game = Game(headless=True, seed=0)
+    suites: Dict[str, Callable[[], Dict[str, float]]] = {
+        "generation": partial(bench_generation, game, args.repeat // 10),
+        "prepared": partial(bench_prepared, game, args.repeat // 10),
+        "node_pool": partial(bench_node_pool, game, args.repeat * 10),
+        "track_list": partial(bench_track_list, args.repeat * 10),
+        "visibility": partial(bench_visibility, args.repeat),
+        "spatial_hash": partial(bench_spatial_hash, args.repeat),
+        "quality": partial(bench_quality_governor, args.repeat * 10),
+        "move_player": partial(bench_move_player, game, args.repeat),
+        "die": partial(bench_die, game, args.repeat // 20),
+    }
+    results: Dict[str, float] = {}
+    for name, suite in suites.items():
+        print(f"running {name}...", file=sys.stderr)
+        results.update(suite())
+
+    report = {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "panda3d": PandaSystem.getVersionString(),
+        "unit": "seconds",
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        if not compare(results, baseline):
+            sys.exit(1)
+    else:
+        for name, seconds in results.items():
+            print(f"{name:<32}{seconds * 1e6:>11.2f} us")
+
+
+if __name__ == "__main__":
+    main()
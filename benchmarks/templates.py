@@ -0,0 +1,68 @@
+import argparse
+
+from panda3d.core import Point3F
+
+from benchmarks.common import headless_base, measure
+from utils.track_generation import (
+    COLLECTION_PARTS,
+    COLLECTION_LENGTHS,
+    Track,
+    TrackCollectionGenerator,
+)
+from utils.track_geometry import track_geometry
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare cached template placement with per-segment generation."
+    )
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--heading", type=int, default=90)
+    args = parser.parse_args()
+
+    base = headless_base()
+    generator = TrackCollectionGenerator(base.render, base.loader)
+    start_pos = Point3F(0, -10, 5)
+
+    print(
+        f"{'collection':<12}{'kernel':>12}{'template':>12}"
+        f"{'generated':>12}{'placed':>12}   (per segment)"
+    )
+    for collection, lengths in COLLECTION_LENGTHS.items():
+        num_tracks = lengths[0]
+
+        def kernel():
+            for part in COLLECTION_PARTS[collection](num_tracks):
+                track_geometry(
+                    **part._asdict(),
+                    initial_heading=args.heading,
+                    start_pos=start_pos,
+                    length=Track.LENGTH,
+                )
+
+        def template():
+            generator.collection_template(
+                collection, args.heading, num_tracks
+            ).translated(start_pos)
+
+        def place():
+            generator._generate_collection(
+                collection, start_pos, args.heading, num_tracks
+            ).clear()
+
+        timings = [measure(kernel, args.repeat), measure(template, args.repeat)]
+        for use_templates in (False, True):
+            generator.use_templates = use_templates
+            timings.append(measure(place, args.repeat))
+
+        total_tracks = sum(
+            part.num_tracks for part in COLLECTION_PARTS[collection](num_tracks)
+        )
+        print(
+            f"{collection:<12}"
+            + "".join(f"{t / total_tracks * 1e6:>9.2f} us" for t in timings)
+        )
+
+
+if __name__ == "__main__":
+    main()
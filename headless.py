@@ -0,0 +1,253 @@
+import argparse
+import random
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from panda3d.core import ClockObject
+
+from main import Game
+from utils.difficulty import Difficulty
+from utils.replay import OVERLAP_FILTER_VERSION, Replay
+from utils.simulation import Simulation
+from utils.track_generation import TRACK_MESHES
+
+Policy = Callable[[Game], Optional[str]]
+
+
+class SessionResult(NamedTuple):
+    seed: int
+    score: int
+    steps: int
+    wall_time: float
+    cause: Optional[str]
+
+    @property
+    def steps_per_second(self) -> float:
+        return self.steps / self.wall_time if self.wall_time else 0.0
+
+
+class BotPolicy:
+    def __init__(
+        self,
+        reaction_time: float = 0.4,
+        rng: Optional[random.Random] = None,
+        jitter: float = 0.0,
+    ):
+        self.reaction_time = reaction_time
+        self.rng = rng or random.Random()
+        self.jitter = jitter
+        self.seen_tick: Optional[int] = None
+        self.delay = reaction_time
+
+    def __call__(self, game: Game) -> Optional[str]:
+        if not game.currently_active_collections:
+            self.seen_tick = None
+            return None
+        if self.seen_tick is None:
+            self.seen_tick = game.simulation.tick
+            if self.jitter:
+                self.delay = max(0.0, self.rng.gauss(self.reaction_time, self.jitter))
+        waited = (game.simulation.tick - self.seen_tick) * game.simulation.step_dt
+        if waited < self.delay:
+            return None
+        self.seen_tick = None
+        return self.rng.choice(sorted(game.currently_active_collections))
+
+
+class ScriptedPolicy:
+    def __init__(self, events: Sequence[Tuple[int, str]]):
+        self.events = sorted(events)
+        self.next_event = 0
+
+    def __call__(self, game: Game) -> Optional[str]:
+        if self.next_event >= len(self.events):
+            return None
+        tick, collection = self.events[self.next_event]
+        if game.simulation.tick < tick:
+            return None
+        self.next_event += 1
+        return collection
+
+
+def run_session(
+    game: Game,
+    policy: Policy,
+    seed: int,
+    dt: float = 1 / 120,
+    max_steps: Optional[int] = None,
+) -> SessionResult:
+    clock = ClockObject.getGlobalClock()
+    clock.setMode(ClockObject.MNonRealTime)
+    clock.setFrameRate(1 / dt)
+
+    game.start_game(seed)
+    steps = 0
+    start = perf_counter()
+    while game.playing and (max_steps is None or steps < max_steps):
+        collection = policy(game)
+        if collection is not None:
+            game.place_track(collection)
+        if not game.playing:
+            break
+        game.taskMgr.step()
+        steps += 1
+    wall_time = perf_counter() - start
+    score = game.current_track_index
+    if game.playing:
+        game.die("Session step limit reached")
+    return SessionResult(seed, score, steps, wall_time, game.death_cause)
+
+
+def simulate_session(
+    game: Game, policy: Policy, seed: int, max_ticks: Optional[int] = None
+) -> SessionResult:
+    game.prebuild_collections = False
+    game.start_game(seed)
+    start = perf_counter()
+    try:
+        while game.playing:
+            collection = policy(game)
+            while game.playing and collection is not None:
+                game.place_track(collection)
+                collection = policy(game) if game.playing else None
+            if not game.playing:
+                break
+            if max_ticks is not None and game.simulation.tick >= max_ticks:
+                game.die("Session step limit reached")
+                break
+            game.simulate_step()
+    finally:
+        game.prebuild_collections = True
+    wall_time = perf_counter() - start
+    return SessionResult(
+        seed,
+        game.current_track_index,
+        game.simulation.tick,
+        wall_time,
+        game.death_cause,
+    )
+
+
+def play_replay(game: Game, replay: Replay) -> SessionResult:
+    if replay.step_rate != Simulation.STEP_RATE:
+        raise ValueError(
+            f"Replay was recorded at {replay.step_rate} Hz, "
+            f"the simulation runs at {Simulation.STEP_RATE} Hz"
+        )
+    if replay.retained_tracks < Game.min_retained_tracks(game.difficulty):
+        raise ValueError(
+            f"Replay retained {replay.retained_tracks} tracks, at least "
+            f"{Game.min_retained_tracks(game.difficulty)} are needed"
+        )
+    retained_tracks = game.retained_tracks
+    game.avoid_overlaps = replay.version >= OVERLAP_FILTER_VERSION
+    game.retained_tracks = replay.retained_tracks
+    try:
+        return simulate_session(
+            game, ScriptedPolicy(replay.inputs()), replay.seed, replay.ticks
+        )
+    finally:
+        game.avoid_overlaps = True
+        game.retained_tracks = retained_tracks
+
+
+def verify_replay(game: Game, replay: Replay) -> bool:
+    result = play_replay(game, replay)
+    ok = result.score == replay.score and game.replay.layout == replay.layout
+    print(
+        f"seed {replay.seed}: score {result.score}/{replay.score}, "
+        f"layout {game.replay.layout:08x}/{replay.layout:08x}, "
+        f"{result.steps_per_second / replay.step_rate:.0f}x real time"
+        f"{'' if ok else '  MISMATCH'}"
+    )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run Infinity Coaster sessions without a window or audio."
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sessions", type=int, default=1)
+    parser.add_argument("--dt", type=float, default=1 / 120)
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=36000,
+        help="end each session after this many frames (5 minutes at the default dt)",
+    )
+    parser.add_argument("--reaction-time", type=float, default=0.4)
+    parser.add_argument(
+        "--record", type=Path, help="save a replay of every session to this directory"
+    )
+    parser.add_argument(
+        "--replay",
+        type=Path,
+        nargs="+",
+        help="play back these replays and check their score and track layout",
+    )
+    parser.add_argument("--track-mesh", choices=TRACK_MESHES, default="model")
+    parser.add_argument("--retained-tracks", type=int, default=Game.RETAINED_TRACKS)
+    parser.add_argument(
+        "--latency-output",
+        type=Path,
+        help="write track placement to first draw latencies to this .json file",
+    )
+    args = parser.parse_args()
+    if args.retained_tracks < Game.min_retained_tracks(Difficulty()):
+        parser.error(
+            "--retained-tracks must be at least "
+            f"{Game.min_retained_tracks(Difficulty())}"
+        )
+
+    game = Game(
+        headless=True,
+        record_dir=args.record,
+        track_mesh=args.track_mesh,
+        retained_tracks=args.retained_tracks,
+    )
+    if args.replay:
+        ok = [verify_replay(game, Replay.load(path)) for path in args.replay]
+        sys.exit(0 if all(ok) else 1)
+
+    results: List[SessionResult] = []
+    for seed in range(args.seed, args.seed + args.sessions):
+        policy = BotPolicy(args.reaction_time, random.Random(seed))
+        result = run_session(game, policy, seed, args.dt, args.max_steps)
+        results.append(result)
+        print(
+            f"seed {result.seed}: score {result.score}, {result.steps} steps, "
+            f"{result.steps_per_second:.0f} steps/s ({result.cause})"
+        )
+
+    total_steps = sum(result.steps for result in results)
+    total_time = sum(result.wall_time for result in results)
+    print(f"total: {total_steps} steps, {total_steps / total_time:.0f} steps/s")
+    pool = game.track_generator.node_pool.stats()
+    if pool["hits"] or pool["misses"]:
+        print(f"node pool: {pool}")
+    restart = game.profiler.stats("start_game")
+    print(
+        f"start_game: p50 {restart['p50'] * 1000:.2f} ms, "
+        f"max {restart['max'] * 1000:.2f} ms over {restart['count']} sessions"
+    )
+    for label, stats in sorted(game.profiler.summary().items()):
+        if label.startswith("generate_collection.") and stats["count"]:
+            print(
+                f"{label.split('.', 1)[1]}: p50 {stats['p50'] * 1000:.2f} ms, "
+                f"p95 {stats['p95'] * 1000:.2f} ms over {stats['count']} collections"
+            )
+    latency = game.latency.summary()["total"]
+    if latency["count"]:
+        print(
+            f"place to first draw: p50 {latency['p50'] * 1000:.2f} ms, "
+            f"p95 {latency['p95'] * 1000:.2f} ms over {latency['count']} placements"
+        )
+    if args.latency_output:
+        game.latency.dump(args.latency_output)
+
+
+if __name__ == "__main__":
+    main()
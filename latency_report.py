@@ -0,0 +1,108 @@
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from utils.latency import BUCKETS, bucket_labels, histogram, load_latency, summarize
+
+BAR_WIDTH = 40
+
+
+def print_summary(samples: Dict[str, List[float]], budget: float) -> None:
+    print(f"{'segment':<14}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for segment, values in samples.items():
+        stats = summarize(values, budget)
+        if not stats["count"]:
+            print(f"{segment:<14}{0:>7}")
+            continue
+        print(
+            f"{segment:<14}{stats['count']:>7}"
+            + "".join(
+                f"{stats[key] * 1e3:>7.2f} ms" for key in ("p50", "p95", "p99", "max")
+            )
+        )
+
+
+def print_histogram(values: List[float]) -> None:
+    counts = histogram(values)
+    most = max(counts) or 1
+    for label, count in zip(bucket_labels(BUCKETS), counts):
+        print(f"{label:>14} {count:>6} {'#' * round(count / most * BAR_WIDTH)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show track placement latencies and check them against a "
+        "budget and a baseline build."
+    )
+    parser.add_argument("report", type=Path, help="a --latency-output .json file")
+    parser.add_argument(
+        "--baseline", type=Path, help="a report from the build to compare against"
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        help="total latency budget in milliseconds (defaults to the report's)",
+    )
+    parser.add_argument("--percentile", type=float, default=95)
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.1,
+        help="allowed relative slowdown of any segment against the baseline",
+    )
+    parser.add_argument(
+        "--regression-slack",
+        type=float,
+        default=1.0,
+        help="slowdowns below this many milliseconds are never regressions",
+    )
+    args = parser.parse_args()
+
+    budget, samples = load_latency(args.report)
+    if args.budget is not None:
+        budget = args.budget / 1000
+    print_summary(samples, budget)
+    print("total:")
+    print_histogram(samples["total"])
+
+    failures = []
+    if samples["total"]:
+        total = np.percentile(samples["total"], args.percentile)
+        if total > budget:
+            failures.append(
+                f"p{args.percentile:g} total {total * 1e3:.2f} ms is over the "
+                f"{budget * 1e3:.2f} ms budget"
+            )
+
+    if args.baseline:
+        _, baseline = load_latency(args.baseline)
+        print(f"p{args.percentile:g} against {args.baseline}:")
+        for segment, values in samples.items():
+            if not values or not baseline.get(segment):
+                continue
+            before = np.percentile(baseline[segment], args.percentile)
+            after = np.percentile(values, args.percentile)
+            change = (after - before) / before if before else 0.0
+            print(
+                f"{segment:<14}{before * 1e3:>7.2f} ms ->{after * 1e3:>7.2f} ms "
+                f"({change:+.0%})"
+            )
+            if (
+                after > before * (1 + args.max_regression)
+                and after - before > args.regression_slack / 1000
+            ):
+                failures.append(
+                    f"{segment} regressed from {before * 1e3:.2f} ms "
+                    f"to {after * 1e3:.2f} ms"
+                )
+
+    for failure in failures:
+        print(failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
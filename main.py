@@ -1,71 +1,194 @@
+import argparse
+import atexit
+import itertools
 import random
 import sys
 from functools import partial
 from pathlib import Path
 from textwrap import dedent
-from typing import Set
+from time import time
+from typing import Dict, Optional, Sequence, Set
 
 from direct.gui.DirectButton import DirectButton
 from direct.gui import DirectGuiGlobals as DDG
 from direct.gui.OnscreenImage import OnscreenImage
 from direct.gui.OnscreenText import OnscreenText
-from direct.filter.CommonFilters import CommonFilters
 
 from direct.showbase.ShowBase import ShowBase
 from direct.task.Task import Task
 from panda3d.core import (
+    ButtonThrower,
     ClockObject,
-    NodePath,
-    Point3F,
+    KeyboardButton,
+    ModifierButtons,
     Vec3,
     WindowProperties,
-    TextNode,
     AmbientLight,
     DirectionalLight,
     TextureStage,
     TexGenAttrib,
     TransparencyAttrib,
+    loadPrcFileData,
 )
 
-from utils.track_generation import Track, TrackCollectionGenerator, TrackList
+from utils.assets import (
+    GAME_DIR,
+    MUSIC,
+    asset_path,
+    load_cube_map,
+    mount_baked_assets,
+)
+from utils.track_generation import (
+    COLLECTION_PARTS,
+    MAX_COLLECTION_TRACKS,
+    PreparedCollection,
+    TRACK_MESHES,
+    Track,
+    TrackCollectionGenerator,
+    TrackList,
+)
+from utils.difficulty import Difficulty
+from utils.ghosts import GhostRiders
+from utils.latency import LatencyTracer
+from utils.leaderboard import Leaderboard, RunRecord
 from utils.menu import Menu
+from utils.profiling import FrameProfiler, ProfilerOverlay, StartupTimer
+from utils.quality import QUALITY_TIERS, QualityGovernor, QualityTier, TierChange
+from utils.replay import Replay, layout_checksum
+from utils.session import INITIAL_TRACKS, SessionResources, icon_path
+from utils.simulation import Simulation
+from utils.spatial_hash import SpatialHash
+from utils.visibility import TrackVisibility
 
-HIGH_SCORE_FILE = Path("hs.txt")
-if not HIGH_SCORE_FILE.exists():
-    with open(HIGH_SCORE_FILE, "w") as f:
-        f.write("0")
+STARTUP_TIMER = StartupTimer()
+STARTUP_TIMER.mark("imports")
+
+HEADLESS_CONFIG = f"""
+window-type none
+audio-library-name null
+model-path {GAME_DIR}
+"""
 
 
 class Game(ShowBase):
-    def __init__(self):
+    PREBUILD_TRACKS_PER_FRAME = 12
+    TIMED_KEY_PREFIX = "timed-"
+    OVERLAP_CLEARANCE = 1.5
+    OVERLAP_IGNORE_RECENT = 4
+    RETAINED_TRACKS = 100
+
+    def __init__(
+        self,
+        headless: bool = False,
+        seed: Optional[int] = None,
+        pstats: bool = False,
+        record_dir: Optional[Path] = None,
+        difficulty: Difficulty = Difficulty(),
+        startup_report: bool = False,
+        frame_budget: float = 1 / 60,
+        quality: Optional[str] = None,
+        ghost_replays: Sequence[Replay] = (),
+        race_best: bool = False,
+        player_name: str = "player",
+        latency_budget: float = LatencyTracer.BUDGET,
+        track_mesh: str = "model",
+        retained_tracks: int = RETAINED_TRACKS,
+    ):
+        if retained_tracks < self.min_retained_tracks(difficulty):
+            raise ValueError(
+                f"Retaining {retained_tracks} tracks, at least "
+                f"{self.min_retained_tracks(difficulty)} are needed"
+            )
+        if headless:
+            loadPrcFileData("", HEADLESS_CONFIG)
         super().__init__()
+        self.startup_report = startup_report
+        self.frame_budget = frame_budget
+        self.fixed_quality = quality
+        self.visible_window = (TrackVisibility.AHEAD, TrackVisibility.BEHIND)
+        self.ghost_replays = list(ghost_replays)
+        self.race_best = race_best
+        self.best_replay: Optional[Replay] = None
+        self.baked_assets = mount_baked_assets()
+        STARTUP_TIMER.mark("showbase")
+        self.headless = headless
+        self.track_mesh = track_mesh
+        self.retained_tracks = retained_tracks
+        self.rng = random.Random(seed)
+        self.record_dir = record_dir
+        self.difficulty = difficulty
+        self.playing = False
+        self.prebuild_collections = True
+        self.avoid_overlaps = True
+        self.prepared_collections: Dict[str, PreparedCollection] = {}
+        self.collection_lengths: Dict[str, int] = {}
+        self.profiler = FrameProfiler(pstats=pstats)
+        self.taskMgr.add(self.profiler.frame_task, "FrameProfilerTask", sort=-100)
+        self.latency = LatencyTracer(self.render, latency_budget)
+        self.taskMgr.add(self.latency.frame_task, "LatencyTraceTask", sort=55)
+        self.player_name = player_name
+        self.leaderboard: Optional[Leaderboard] = None
+        self.high_score = 0
+        if not headless:
+            self.leaderboard = Leaderboard()
+            self.high_score = self.leaderboard.high_score
+            atexit.register(self.leaderboard.close)
+
+        self.assets_ready = False
+        self.player_node = self.render.attachNewNode("player_node")
+        self.ghosts = GhostRiders(self.render)
+        if headless:
+            self.camera = self.render.attachNewNode("camera")
+            self.setup_gameplay()
+            return
+
         props = WindowProperties()
         props.set_title("Infinity Coaster")
         props.icon_filename = "assets/logo.ico"
         base.win.requestProperties(props)
-        with open(HIGH_SCORE_FILE) as f:
-            self.high_score = int(f.read())
-        cube_map = self.loader.loadCubeMap("assets/skybox/sky_#.png")
-        self.sky_box = self.loader.loadModel("assets/models/box.bam")
-        self.sky_box.setScale(50)
-        self.sky_box.setBin("background", 0)
-        self.sky_box.setDepthWrite(0)
-        self.sky_box.setTwoSided(True)
-        self.sky_box.setTexGen(TextureStage.getDefault(), TexGenAttrib.MWorldCubeMap)
-        self.sky_box.setTexture(cube_map, 1)
-        self.sky_box.reparentTo(self.render)
-
-        self.filters = CommonFilters(base.win, base.cam)
-        self.filters.setBloom(
-            blend=(0, 0, 0, 1), desat=-0.5, intensity=2.0, size="small"
-        )
 
         alight = AmbientLight("alight")
         alnp = self.render.attachNewNode(alight)
         alight.setColor((0, 0.7, 1.0, 1))
         self.render.setLight(alnp)
 
-        self.track_generator = TrackCollectionGenerator(self.render, self.loader)
+        self.accept("escape", sys.exit)
+        self.setup_timed_keys()
+        self.accept("aspectRatioChanged", self.set_center)
+        self.profiler_overlay = ProfilerOverlay(self.profiler, self.render)
+        self.accept("f3", self.profiler_overlay.toggle)
+
+        self.start_menu: Optional[Menu] = None
+        self.show_start_menu()
+        STARTUP_TIMER.mark("menu")
+        self.taskMgr.add(self.startup_frame_task, "StartupFrameTask", sort=100)
+        self.taskMgr.setupTaskChain("asset_loading", numThreads=1)
+        self.taskMgr.add(self.load_assets(), "LoadAssetsTask")
+
+    @staticmethod
+    def min_retained_tracks(difficulty: Difficulty) -> int:
+        return MAX_COLLECTION_TRACKS + difficulty.lookahead + TrackVisibility.BEHIND
+
+    def setup_timed_keys(self):
+        if self.mouseWatcher is None:
+            return
+        timed_keys = ButtonThrower("timed_keys")
+        timed_keys.set_prefix(self.TIMED_KEY_PREFIX)
+        timed_keys.set_time_flag(True)
+        timed_keys.set_throw_buttons_active(True)
+        for i in range(1, len(COLLECTION_PARTS) + 1):
+            timed_keys.add_throw_button(
+                ModifierButtons(), KeyboardButton.ascii_key(str(i))
+            )
+        self.mouseWatcher.attachNewNode(timed_keys)
+
+    def setup_gameplay(self):
+        self.track_generator = TrackCollectionGenerator(
+            self.render,
+            self.loader,
+            procedural_mesh=self.track_mesh == "procedural",
+            rng=self.rng,
+        )
         self.track_collections = {
             "straight": self.track_generator.generate_straight,
             "ramp_up": partial(self.track_generator.generate_ramp, type_="up"),
@@ -74,19 +197,98 @@ class Game(ShowBase):
             "turn_right": partial(self.track_generator.generate_turn, type_="right"),
             "loop": self.track_generator.generate_loop,
         }
-        self.accept("escape", sys.exit)
+        self.resources = SessionResources(
+            self.loader, self.aspect2d, self.track_generator, self.track_collections
+        )
+        self.assets_ready = True
+
+    def startup_frame_task(self, _task):
+        STARTUP_TIMER.mark("first_frame")
+        self.profiler.record("first_frame", STARTUP_TIMER.total)
+        return Task.done
+
+    async def load_assets(self):
+        await Task.pause(0)
+        self.loader.loadMusic(asset_path(MUSIC), callback=self.play_music)
+        textures = self.taskMgr.add(
+            self.load_textures_task, "LoadTexturesTask", taskChain="asset_loading"
+        )
+        self.sky_box = await self.loader.loadModel(
+            asset_path("assets/models/box.bam"), blocking=False
+        )
+        await textures
+        STARTUP_TIMER.mark("textures")
+
+        self.sky_box.setScale(50)
+        self.sky_box.setBin("background", 0)
+        self.sky_box.setDepthWrite(0)
+        self.sky_box.setTwoSided(True)
+        self.sky_box.setTexGen(TextureStage.getDefault(), TexGenAttrib.MWorldCubeMap)
+        self.sky_box.setTexture(self.cube_map, 1)
+        self.sky_box.reparentTo(self.render)
+        await Task.pause(0)
+
+        self.setup_filters()
+        STARTUP_TIMER.mark("filters")
+        await Task.pause(0)
+
+        self.setup_gameplay()
+        STARTUP_TIMER.mark("ready")
+        self.profiler.record("assets_ready", STARTUP_TIMER.total)
+        if self.start_menu is not None:
+            self.start_menu.set_enabled("NEW GAME", True)
+        if self.startup_report:
+            print(STARTUP_TIMER.report())
 
-        self.music = self.loader.loadMusic("assets/music/Guitar-Mayhem-3.wav")
+    def load_textures_task(self, _task):
+        self.cube_map = load_cube_map(self.loader)
+        for collection in COLLECTION_PARTS:
+            self.loader.loadTexture(icon_path(collection))
+        return Task.done
+
+    def setup_filters(self):
+        from direct.filter.CommonFilters import CommonFilters
+
+        self.filters = CommonFilters(base.win, base.cam)
+        tier_names = [tier.name for tier in QUALITY_TIERS]
+        self.quality = QualityGovernor(
+            self.apply_quality_tier,
+            budget=self.frame_budget,
+            initial_tier=tier_names.index(self.fixed_quality or tier_names[0]),
+            adaptive=self.fixed_quality is None,
+            on_change=self.report_quality_change,
+        )
+
+    def report_quality_change(self, change: TierChange):
+        print(
+            f"quality {change.previous} -> {change.tier} "
+            f"(p{QualityGovernor.PERCENTILE} frame {change.frame_time * 1e3:.1f} ms, "
+            f"budget {self.frame_budget * 1e3:.1f} ms)"
+        )
+
+    def apply_quality_tier(self, tier: QualityTier):
+        self.filters.setBloom(
+            blend=(0, 0, 0, 1), desat=-0.5, intensity=2.0, size=tier.bloom
+        )
+        self.visible_window = (tier.visible_ahead, tier.visible_behind)
+        if self.playing:
+            self.visibility.resize(*self.visible_window)
+
+    def play_music(self, music):
+        self.music = music
         self.music.setVolume(0.5)
         self.music.setLoop(True)
         self.music.play()
-        self.show_start_menu()
 
     def show_start_menu(self):
-        im = OnscreenImage("assets/logo.png", pos=(0, 0, 0.6), scale=(0.8, 1, 0.4))
-        title = OnscreenImage("assets/title.png", pos=(0, 0, 0.1), scale=(0.8, 1, 0.12))
+        im = OnscreenImage(
+            asset_path("assets/logo.png"), pos=(0, 0, 0.6), scale=(0.8, 1, 0.4)
+        )
+        title = OnscreenImage(
+            asset_path("assets/title.png"), pos=(0, 0, 0.1), scale=(0.8, 1, 0.12)
+        )
         title.setTransparency(TransparencyAttrib.MAlpha)
-        Menu(
+        self.start_menu = Menu(
             {
                 "NEW GAME": (
                     lambda: [self.start_game(), im.destroy(), title.destroy()],
@@ -103,6 +305,7 @@ class Game(ShowBase):
                 "QUIT": (sys.exit, (0, -0.75)),
             }
         )
+        self.start_menu.set_enabled("NEW GAME", self.assets_ready)
 
     def show_instructions(self):
         text = OnscreenText(
@@ -170,65 +373,68 @@ class Game(ShowBase):
             text_shadow=(0, 0.0425, 0.0625, 1),
         )
 
-    def start_game(self):
+    def start_game(self, seed: Optional[int] = None):
+        with self.profiler.timed("start_game"):
+            self._start_game(seed)
+
+    def _start_game(self, seed: Optional[int] = None):
+        if seed is None:
+            seed = self.rng.getrandbits(32)
+        self.rng.seed(seed)
+        self.replay = Replay(seed, [], retained_tracks=self.retained_tracks)
+        self.layout_checksum = 0
+
         self.disable_mouse()
-        props = WindowProperties()
-        props.setCursorHidden(True)
-        base.win.requestProperties(props)
+        self.set_cursor_hidden(True)
+        self.playing = True
+        self.death_cause = None
 
-        self.score_node = TextNode("score_node")
-        self.score_node_path = self.aspect2d.attachNewNode(self.score_node)
-        self.score_node_path.set_scale(0.1)
-        self.score_node_path.set_pos((-1, 0, 0.75))
+        self.resources.reset()
 
-        self.speed = 9
-        self.acceleration = 0.4
-        self.track_generator.total_tracks_placed = 0
+        self.simulation = Simulation(
+            speed=self.difficulty.speed,
+            acceleration=self.difficulty.acceleration,
+            max_speed=self.difficulty.max_speed,
+            track_length=Track.LENGTH,
+        )
         self.current_track_index = 0
         self.track_heading = 0
-
-        self.tracks = TrackList(maxlen=100)
+        self.collections_placed = 0
+        self.ghosts.clear()
+        for replay in self.ghost_replays:
+            self.ghosts.add_replay(replay, self.difficulty)
+        if self.race_best and self.best_replay is not None:
+            self.ghosts.add_replay(self.best_replay, self.difficulty)
+
+        self.tracks = TrackList(
+            maxlen=self.retained_tracks,
+            node_pool=self.track_generator.node_pool,
+            spatial_index=SpatialHash(),
+        )
         self.set_tracks()
+        self.visibility = TrackVisibility(self.tracks, *self.visible_window)
 
-        self.player_node = NodePath("player_node")
-        self.player_node.reparentTo(self.render)
         self.player_node.set_pos(self.current_track.start_pos)
         self.camera.reparentTo(self.player_node)
         self.camera.set_pos(self.tracks.head.normal)
 
-        icon_bar_x = 1.33333 - 0.1 - 0.2
-        self.icons = {
-            icon_name: OnscreenImage(
-                image=f"assets/track_icons/{icon_name}_icon.png",
-                pos=(icon_bar_x, 0, ((7 - i) * 2 / 7) - 1),
-                scale=(0.15, 15, 0.15),
-            )
-            for i, icon_name in enumerate(self.track_collections.keys(), start=1)
-        }
-        self.currently_active_collections = self.generate_active_collections()
-        self.update_icon_tray()
+        self.set_active_collections()
 
         self.center = []
-        self.set_center()
+        if not self.headless:
+            self.set_center()
         self.rot_v = 0
         self.rot_h = 0
         self.mouse_sensitivity = 30
-
-        self.ambient_sound = base.loader.loadSfx("assets/sfx/ambient.wav")
-        self.ambient_sound.setVolume(0.5)
-        self.ambient_sound.setLoop(True)
-        self.ambient_sound.play()
-        self.place_track_sound = self.loader.loadSfx("assets/sfx/place.wav")
-        self.death_sound = self.loader.loadSfx("assets/sfx/death.wav")
-
-        self.accept("aspectRatioChanged", self.set_center)
         self.unpause()
 
     def pause(self, show_resume: bool = True):
         self.taskMgr.remove("MovePlayerTask")
         self.taskMgr.remove("UpdateScoreTask")
         self.taskMgr.remove("PositionSkyBoxTask")
-        self.ambient_sound.stop()
+        self.taskMgr.remove("QualityGovernorTask")
+        self.taskMgr.remove("PrebuildTracksTask")
+        self.resources.ambient_sound.stop()
         self.ignore("space")
         if show_resume:
             self.accept("space", lambda: [b.destroy(), self.unpause()])
@@ -244,39 +450,77 @@ class Game(ShowBase):
                 frameColor=(0, 0.35, 0.5, 1),
                 text_shadow=(0, 0.0425, 0.0625, 1),
             )
-        props = WindowProperties()
-        props.setCursorHidden(False)
-        base.win.requestProperties(props)
+        self.set_cursor_hidden(False)
 
         for i, _ in enumerate(self.track_collections.keys(), start=1):
-            self.ignore(str(i))
+            self.ignore(f"{self.TIMED_KEY_PREFIX}{i}")
 
     def unpause(self):
-        self.taskMgr.add(self.move_player_task, "MovePlayerTask")
-        self.taskMgr.add(self.update_score_task, "UpdateScoreTask")
-        self.taskMgr.add(self.position_skybox_task, "PositionSkyBoxTask")
-        self.ambient_sound.play()
-        props = WindowProperties()
-        props.setCursorHidden(True)
-        base.win.requestProperties(props)
+        self.taskMgr.add(
+            self.profiler.wrap_task("MovePlayerTask", self.move_player_task),
+            "MovePlayerTask",
+        )
+        self.taskMgr.add(
+            self.profiler.wrap_task("UpdateScoreTask", self.update_score_task),
+            "UpdateScoreTask",
+        )
+        self.taskMgr.add(
+            self.profiler.wrap_task("PrebuildTracksTask", self.prebuild_tracks_task),
+            "PrebuildTracksTask",
+        )
+        if not self.headless:
+            self.taskMgr.add(
+                self.profiler.wrap_task(
+                    "PositionSkyBoxTask", self.position_skybox_task
+                ),
+                "PositionSkyBoxTask",
+            )
+            self.quality.reset()
+            self.taskMgr.add(self.quality.frame_task, "QualityGovernorTask", sort=-99)
+        self.resources.ambient_sound.play()
+        self.set_cursor_hidden(True)
         self.ignore("space")
         self.accept("space", self.pause)
 
         for i, collection in enumerate(self.track_collections.keys(), start=1):
-            self.accept(str(i), self.place_track, [collection])
+            self.accept(f"{self.TIMED_KEY_PREFIX}{i}", self.place_track, [collection])
 
     def die(self, cause: str):
-        self.death_sound.play()
-        if self.current_track_index > self.high_score:
-            self.high_score = self.current_track_index
-            with open(HIGH_SCORE_FILE, "w") as f:
-                f.write(str(self.high_score))
+        self.playing = False
+        self.death_cause = cause
+        self.replay = self.replay._replace(
+            ticks=self.simulation.tick,
+            score=self.current_track_index,
+            layout=self.layout_checksum,
+        )
+        if self.record_dir is not None:
+            self.record_dir.mkdir(parents=True, exist_ok=True)
+            self.replay.save(
+                self.record_dir / f"{int(time())}-{self.replay.seed}.replay"
+            )
+        if self.best_replay is None or self.replay.score > self.best_replay.score:
+            self.best_replay = self.replay
+        self.resources.death_sound.play()
+        self.high_score = max(self.high_score, self.current_track_index)
+        if self.leaderboard is not None:
+            self.leaderboard.record(
+                RunRecord(
+                    self.player_name,
+                    self.current_track_index,
+                    self.simulation.tick * self.simulation.step_dt,
+                    self.simulation.speed,
+                    self.collections_placed,
+                    self.replay.seed,
+                )
+            )
         self.pause(show_resume=False)
-        for track in self.tracks:
-            track.node_path.removeNode()
-        for icon in self.icons.values():
-            icon.destroy()
-        self.score_node_path.removeNode()
+        self.latency.cancel()
+        self.discard_prepared_collections()
+        self.tracks.clear()
+        self.ghosts.clear()
+        self.resources.hide()
+        if self.headless:
+            return
 
         t1 = OnscreenText(
             text=cause,
@@ -317,16 +561,35 @@ class Game(ShowBase):
             }
         )
 
-    def place_track(self, collection: str):
+    def place_track(self, collection: str, input_time: Optional[float] = None):
+        trace = self.latency.begin(collection, input_time)
+        self.replay.record(self.simulation.tick, collection)
+        first_index = self.tracks.next_index
+        with self.profiler.timed("place_track"):
+            self._place_track(collection)
+        if self.playing:
+            self.latency.placed(trace, self.tracks[first_index].node_path)
+
+    def _place_track(self, collection: str):
         if collection not in self.currently_active_collections:
             self.die("You tried to press an inactive track and died!")
             return
-        self.place_track_sound.play()
-        new_tracks = self.track_collections[collection](
-            start_pos=self.tracks.tail.end_pos,
-            initial_heading=self.track_heading,
-        )
+        self.resources.place_track_sound.play()
+        prepared = self.prepared_collections.pop(collection, None)
+        with self.profiler.timed(f"generate_collection.{collection}"):
+            if prepared is not None:
+                new_tracks = self.track_generator.finish_prepared(prepared)
+            else:
+                new_tracks = self.track_generator.generate_collection(
+                    collection,
+                    start_pos=self.tracks.tail.end_pos,
+                    initial_heading=self.track_heading,
+                    num_tracks=self.collection_lengths.get(collection),
+                )
         self.tracks.extend(new_tracks)
+        self.collections_placed += 1
+        self.discard_prepared_collections()
+        self.layout_checksum = layout_checksum(self.tracks, self.layout_checksum)
 
         if collection == "turn_left":
             self.track_heading += 90
@@ -336,45 +599,27 @@ class Game(ShowBase):
         self.update_icon_tray()
 
     def set_tracks(self):
-        self.tracks.extend(
-            self.track_generator.generate_straight(
-                start_pos=Point3F(0, -10, 5),
-                initial_heading=self.track_heading,
-                num_tracks=30,
-            )
-        )
+        num_tracks = self.rng.randint(INITIAL_TRACKS[0], INITIAL_TRACKS[-1])
+        self.tracks.extend(self.resources.initial_track(num_tracks))
         self.current_track = self.tracks.head
 
     def move_player_task(self, _task):
         dt = ClockObject.getGlobalClock().dt
 
-        if (
-            self.player_node.get_pos() - self.current_track.start_pos
-        ).length() > Track.LENGTH:
-            if self.current_track.next_track is not None:
-                self.current_track = self.current_track.next_track
-                self.current_track_index += 1
-            else:
-                self.die("You didn't place a track in time and died!")
+        steps = self.simulation.advance(dt)
+        for _ in range(steps):
+            if not self.simulate_step():
                 return
-        if (
-            self.current_track_index >= self.track_generator.total_tracks_placed - 10
-            and not self.currently_active_collections
-        ):
-            self.currently_active_collections = self.generate_active_collections()
-            self.update_icon_tray()
+        self.ghosts.step(steps)
 
+        self.visibility.update(self.current_track_index)
+        self.ghosts.update(self.tracks, self.simulation.alpha)
         self.player_node.set_pos(
-            self.current_track.start_pos
-            + (
-                self.player_node.get_pos()
-                + self.current_track.direction * self.speed * dt
-                - self.current_track.start_pos
-            ).project(self.current_track.direction)
+            self.tracks.position_at(self.simulation.interpolated_distance())
         )
         self.camera.set_pos(self.current_track.normal * 2)
-        if self.speed < 20:
-            self.speed += self.acceleration * dt
+        if self.headless:
+            return Task.cont
 
         if base.mouseWatcherNode.hasMouse():
             mx = base.mouseWatcherNode.getMouseX()
@@ -387,29 +632,104 @@ class Game(ShowBase):
         base.win.movePointer(0, self.center[0], self.center[1])
         return Task.cont
 
+    def simulate_step(self) -> bool:
+        self.simulation.step()
+        if self.simulation.distance >= self.tracks.end_distance:
+            self.die("You didn't place a track in time and died!")
+            return False
+        if self.simulation.track_index != self.current_track_index:
+            self.current_track_index = self.simulation.track_index
+            self.current_track = self.tracks[self.current_track_index]
+        if (
+            self.current_track_index
+            >= self.tracks.next_index - self.difficulty.lookahead
+            and not self.currently_active_collections
+        ):
+            self.set_active_collections()
+        return True
+
+    def prebuild_tracks_task(self, _task):
+        budget = self.PREBUILD_TRACKS_PER_FRAME
+        for prepared in itertools.chain(
+            self.prepared_collections.values(),
+            self.resources.initial_tracks.values(),
+        ):
+            budget -= self.track_generator.build_prepared(prepared, budget)
+            if budget <= 0:
+                break
+        return Task.cont
+
     def update_score_task(self, _task):
-        self.score_node.set_text(f"SCORE: {self.current_track_index}")
+        self.resources.score_node.set_text(f"SCORE: {self.current_track_index}")
         return Task.cont
 
     def position_skybox_task(self, _task):
         self.sky_box.set_pos(self.camera.get_pos(self.render))
         return Task.cont
 
+    def set_cursor_hidden(self, hidden: bool):
+        if self.headless:
+            return
+        props = WindowProperties()
+        props.setCursorHidden(hidden)
+        base.win.requestProperties(props)
+
     def set_center(self):
         self.center = [base.win.getXSize() // 2, base.win.getYSize() // 2]
 
+    def set_active_collections(self):
+        collection_lengths = {
+            collection: self.track_generator.collection_length(collection)
+            for collection in sorted(self.generate_active_collections())
+        }
+        if self.avoid_overlaps:
+            collection_lengths = self.without_overlaps(collection_lengths)
+        self.collection_lengths = collection_lengths
+        self.currently_active_collections = set(collection_lengths)
+        self.update_icon_tray()
+        if not self.prebuild_collections:
+            return
+        for collection, num_tracks in self.collection_lengths.items():
+            self.prepared_collections[collection] = self.track_generator.prepare(
+                collection, self.tracks.tail.end_pos, self.track_heading, num_tracks
+            )
+
+    def without_overlaps(self, collection_lengths: Dict[str, int]) -> Dict[str, int]:
+        clear = {}
+        for collection, num_tracks in collection_lengths.items():
+            geometry = self.track_generator.collection_geometry(
+                collection, self.tracks.tail.end_pos, self.track_heading, num_tracks
+            )
+            if not self.tracks.overlaps(
+                geometry.start_pos,
+                geometry.end_pos,
+                self.OVERLAP_CLEARANCE,
+                start=self.tracks.next_index + num_tracks - self.tracks.maxlen,
+                stop=self.tracks.next_index - self.OVERLAP_IGNORE_RECENT,
+            ):
+                clear[collection] = num_tracks
+        return clear or collection_lengths
+
+    def discard_prepared_collections(self):
+        for prepared in self.prepared_collections.values():
+            self.track_generator.discard_prepared(prepared)
+        self.prepared_collections.clear()
+
     def generate_active_collections(self) -> Set[str]:
-        k = random.choices([1, 2, 3], weights=[0.1, 0.8, 0.1], k=1)[0]
+        choice_weights = self.difficulty.choice_weights
+        k = self.rng.choices(
+            range(1, len(choice_weights) + 1), weights=choice_weights, k=1
+        )[0]
         return set(
-            random.choices(
+            self.rng.choices(
                 list(self.track_collections.keys()),
-                weights=[0.18, 0.18, 0.18, 0.18, 0.18, 0.07],
+                weights=self.difficulty.collection_weights,
                 k=k,
             )
         )
 
     def update_icon_tray(self):
-        for icon_name, icon in self.icons.items():
+        for icon_name, icon in self.resources.icons.items():
             if icon_name in self.currently_active_collections:
                 icon.show()
             else:
@@ -417,5 +737,116 @@ class Game(ShowBase):
 
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Infinity Coaster")
+    parser.add_argument(
+        "--profile-output",
+        type=Path,
+        help="write per-task frame timings to this .json or .csv file on exit",
+    )
+    parser.add_argument(
+        "--pstats", action="store_true", help="connect to a running PStats server"
+    )
+    parser.add_argument(
+        "--record", type=Path, help="save a replay of every session to this directory"
+    )
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="print cold start timings from process launch to the first menu frame",
+    )
+    parser.add_argument(
+        "--frame-budget",
+        type=float,
+        default=1000 / 60,
+        help="frame time target in milliseconds for the adaptive quality governor",
+    )
+    parser.add_argument(
+        "--quality",
+        choices=[tier.name for tier in QUALITY_TIERS],
+        help="pin a quality tier instead of adapting it to the frame budget",
+    )
+    parser.add_argument(
+        "--ghosts",
+        type=Path,
+        nargs="+",
+        default=[],
+        help="race against ghost riders from these replay files or directories",
+    )
+    parser.add_argument(
+        "--race-best",
+        action="store_true",
+        help="add a ghost of the best run so far to every new session",
+    )
+    parser.add_argument(
+        "--latency-output",
+        type=Path,
+        help="write keypress to first draw latencies of track placement to this "
+        ".json file on exit",
+    )
+    parser.add_argument(
+        "--latency-budget",
+        type=float,
+        default=LatencyTracer.BUDGET * 1000,
+        help="keypress to first draw budget in milliseconds",
+    )
+    parser.add_argument(
+        "--track-mesh",
+        choices=TRACK_MESHES,
+        default="model",
+        help="draw tracks with the textured model or one procedural mesh per "
+        "collection",
+    )
+    parser.add_argument(
+        "--retained-tracks",
+        type=int,
+        default=Game.RETAINED_TRACKS,
+        help="number of placed track segments kept behind and ahead of the player",
+    )
+    parser.add_argument("--player", help="name to record runs under")
+    parser.add_argument(
+        "--leaderboard",
+        type=int,
+        metavar="N",
+        help="print the top N runs (for --player if given) and exit",
+    )
+    args = parser.parse_args()
+    if args.retained_tracks < Game.min_retained_tracks(Difficulty()):
+        parser.error(
+            "--retained-tracks must be at least "
+            f"{Game.min_retained_tracks(Difficulty())}"
+        )
+    if args.leaderboard:
+        leaderboard = Leaderboard()
+        runs = leaderboard.top(args.leaderboard, args.player)
+        for rank, run in enumerate(runs, start=1):
+            print(
+                f"{rank:>3}. {run.player:<16}{run.score:>7} tracks "
+                f"{run.duration:>7.1f} s  max speed {run.max_speed:.1f}  "
+                f"{run.collections_placed} collections  seed {run.seed}"
+            )
+        leaderboard.close()
+        sys.exit()
+    ghost_replays = [
+        Replay.load(path)
+        for ghost in args.ghosts
+        for path in (sorted(ghost.glob("*.replay")) if ghost.is_dir() else [ghost])
+    ]
+
+    game = Game(
+        pstats=args.pstats,
+        record_dir=args.record,
+        startup_report=args.startup_report,
+        frame_budget=args.frame_budget / 1000,
+        quality=args.quality,
+        ghost_replays=ghost_replays,
+        race_best=args.race_best,
+        player_name=args.player or "player",
+        latency_budget=args.latency_budget / 1000,
+        track_mesh=args.track_mesh,
+        retained_tracks=args.retained_tracks,
+    )
+    if args.profile_output:
+        atexit.register(game.profiler.dump, args.profile_output)
+    if args.latency_output:
+        atexit.register(game.latency.dump, args.latency_output)
     game.run()
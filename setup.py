@@ -1,11 +1,26 @@
+from direct.dist.commands import build_apps
 from setuptools import setup
 
+from utils.assets import BAKED_MULTIFILE
+
+
+class BuildApps(build_apps):
+    def run(self):
+        if not BAKED_MULTIFILE.exists():
+            from bake_assets import bake
+
+            print(f"{BAKED_MULTIFILE} not found, baking assets")
+            bake(BAKED_MULTIFILE, compress=True, mipmaps=True, music_quality=4)
+        super().run()
+
+
 setup(
     name="InfinityCoaster",
+    cmdclass={"build_apps": BuildApps},
     options={
         'build_apps': {
             'gui_apps': {
-                "InfinityCoaster": "tracks.py"
+                "InfinityCoaster": "main.py"
             },
             'build_base': "../infinity_build",
             'plugins': [
@@ -13,9 +28,9 @@ setup(
                 "p3openal_audio",
             ],
             "include_patterns": [
-                "*.png",
-                "dna.txt",
-                "models/*"
+                "assets.mf",
+                "assets/logo.ico",
+                "assets/sfx/*",
             ],
         }
     }
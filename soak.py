@@ -0,0 +1,245 @@
+import argparse
+import gc
+import json
+import random
+import sys
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, NamedTuple, Sequence
+
+import numpy as np
+
+from headless import BotPolicy, run_session
+from main import Game
+from utils.simulation import Simulation
+
+
+class Growth(NamedTuple):
+    metric: str
+    early: float
+    late: float
+
+    def __str__(self) -> str:
+        return f"{self.metric}: {self.early:g} -> {self.late:g}"
+
+
+class Sample(NamedTuple):
+    sessions: int
+    simulated_hours: float
+    wall_time: float
+    traced_bytes: int
+    objects: int
+    render_nodes: int
+    aspect2d_nodes: int
+    tasks: int
+    events: int
+    pooled_nodes: int
+    object_types: Dict[str, int]
+
+
+GAUGES = ("render_nodes", "aspect2d_nodes", "tasks", "events")
+
+
+def game_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+    )
+
+
+def take_sample(
+    game: Game,
+    snapshot: tracemalloc.Snapshot,
+    sessions: int,
+    ticks: int,
+    wall_time: float,
+    by_type: bool,
+) -> Sample:
+    objects = [obj for obj in gc.get_objects() if type(obj).__module__ != __name__]
+    object_types = Counter(type(obj).__qualname__ for obj in objects) if by_type else {}
+    return Sample(
+        sessions=sessions,
+        simulated_hours=ticks / Simulation.STEP_RATE / 3600,
+        wall_time=wall_time,
+        traced_bytes=sum(stat.size for stat in snapshot.statistics("filename")),
+        objects=len(objects),
+        render_nodes=game.render.find_all_matches("**;+s").get_num_paths(),
+        aspect2d_nodes=game.aspect2d.find_all_matches("**;+s").get_num_paths(),
+        tasks=len(game.taskMgr.getAllTasks()),
+        events=len(game.messenger.getEvents()),
+        pooled_nodes=len(game.track_generator.node_pool.free),
+        object_types=dict(object_types),
+    )
+
+
+def grows(
+    metric: str, values: Sequence[float], tolerance: float, slack: float
+) -> List[Growth]:
+    half = len(values) // 2
+    early, late = float(np.median(values[:half])), float(np.median(values[half:]))
+    total = (late - early) * (len(values) - 1) / (len(values) / 2)
+    if total > early * tolerance + slack:
+        return [Growth(metric, early, early + total)]
+    return []
+
+
+def rises(
+    metric: str, values: Sequence[float], tolerance: float, slack: float
+) -> List[Growth]:
+    half = len(values) // 2
+    early, late = max(values[:half]), min(values[half:])
+    if late > early * (1 + tolerance) + slack:
+        return [Growth(metric, early, late)]
+    return []
+
+
+def unbounded_growth(
+    samples: Sequence[Sample],
+    byte_tolerance: float,
+    byte_slack: int,
+    object_tolerance: float,
+    object_slack: int,
+    pool_cap: int,
+) -> List[Growth]:
+    growth = grows(
+        "traced_bytes",
+        [sample.traced_bytes for sample in samples],
+        byte_tolerance,
+        byte_slack,
+    )
+    growth += grows(
+        "objects",
+        [sample.objects for sample in samples],
+        object_tolerance,
+        object_slack,
+    )
+    for gauge in GAUGES:
+        growth += rises(gauge, [getattr(sample, gauge) for sample in samples], 0, 0)
+    pooled_nodes = max(sample.pooled_nodes for sample in samples)
+    if pooled_nodes > pool_cap:
+        growth.append(Growth("pooled_nodes", pool_cap, pooled_nodes))
+    type_names = set().union(*(sample.object_types for sample in samples))
+    for name in sorted(type_names):
+        growth += rises(
+            f"objects[{name}]",
+            [sample.object_types.get(name, 0) for sample in samples],
+            object_tolerance,
+            object_slack,
+        )
+    return growth
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Restart headless sessions for hours of simulated time and fail "
+        "if memory, objects or scene-graph nodes keep growing."
+    )
+    parser.add_argument("--hours", type=float, default=2.0)
+    parser.add_argument("--session-seconds", type=float, default=120)
+    parser.add_argument("--dt", type=float, default=1 / 30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reaction-time", type=float, default=0.4)
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument(
+        "--warmup-sessions",
+        type=int,
+        default=40,
+        help="sessions to run before sampling, while pools and caches fill",
+    )
+    parser.add_argument("--sample-every", type=int, default=10, metavar="SESSIONS")
+    parser.add_argument("--byte-tolerance", type=float, default=0.02)
+    parser.add_argument("--byte-slack", type=int, default=256 * 1024)
+    parser.add_argument("--object-tolerance", type=float, default=0.02)
+    parser.add_argument("--object-slack", type=int, default=50)
+    parser.add_argument(
+        "--no-type-counts",
+        action="store_true",
+        help="only track the total object count, not counts per type",
+    )
+    parser.add_argument(
+        "--output", type=Path, help="write the samples to this .json file"
+    )
+    args = parser.parse_args()
+
+    game = Game(headless=True, race_best=True)
+    max_frames = int(args.session_seconds / args.dt)
+    target_ticks = int(args.hours * 3600 * Simulation.STEP_RATE)
+
+    tracemalloc.start()
+    samples: List[Sample] = []
+    baseline = None
+    sessions = ticks = 0
+    start = perf_counter()
+    while ticks < target_ticks or len(samples) < 4:
+        seed = args.seed + sessions
+        policy = BotPolicy(args.reaction_time, random.Random(seed), args.jitter)
+        run_session(game, policy, seed, args.dt, max_frames)
+        sessions += 1
+        ticks += game.simulation.tick
+        if sessions < args.warmup_sessions:
+            continue
+        if (sessions - args.warmup_sessions) % args.sample_every:
+            continue
+        gc.collect()
+        snapshot = game_snapshot()
+        sample = take_sample(
+            game,
+            snapshot,
+            sessions,
+            ticks,
+            perf_counter() - start,
+            not args.no_type_counts,
+        )
+        if baseline is None:
+            baseline = snapshot
+        samples.append(sample)
+        print(
+            f"{sample.sessions:>5} sessions {sample.simulated_hours:>6.2f} h: "
+            f"{sample.traced_bytes / 1024:>9.0f} KiB traced, "
+            f"{sample.objects} objects, {sample.render_nodes} render nodes, "
+            f"{sample.aspect2d_nodes} aspect2d nodes, {sample.tasks} tasks, "
+            f"{sample.events} events, {sample.pooled_nodes} pooled"
+        )
+
+    growth = unbounded_growth(
+        samples,
+        args.byte_tolerance,
+        args.byte_slack,
+        args.object_tolerance,
+        args.object_slack,
+        game.track_generator.node_pool.cap,
+    )
+    wall_time = perf_counter() - start
+    print(
+        f"{sessions} sessions, {ticks / Simulation.STEP_RATE / 3600:.2f} simulated "
+        f"hours in {wall_time:.0f} s"
+    )
+    if args.output:
+        args.output.write_text(
+            json.dumps(
+                {
+                    "samples": [sample._asdict() for sample in samples],
+                    "growth": [item._asdict() for item in growth],
+                },
+                indent=2,
+            )
+        )
+    if not growth:
+        print("memory is bounded")
+        return
+
+    print("unbounded growth:")
+    for item in growth:
+        print(f"  {item}")
+    print("largest allocation increases since the first sample:")
+    for stat in game_snapshot().compare_to(baseline, "lineno")[:10]:
+        print(f"  {stat}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
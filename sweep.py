@@ -0,0 +1,189 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from headless import BotPolicy, simulate_session
+from main import Game
+from utils.difficulty import Difficulty
+from utils.simulation import Simulation
+
+
+class BotModel(NamedTuple):
+    reaction_time: float
+    jitter: float = 0.0
+
+
+class SweepResult(NamedTuple):
+    difficulty: Difficulty
+    bot: BotModel
+    scores: List[int]
+    ticks: List[int]
+    capped: int
+
+    def summary(self) -> Dict[str, float]:
+        scores = np.array(self.scores)
+        seconds = np.array(self.ticks) / Simulation.STEP_RATE
+        p10, p50, p90 = np.percentile(scores, (10, 50, 90))
+        return {
+            "sessions": len(scores),
+            "mean_score": float(scores.mean()),
+            "p10_score": float(p10),
+            "p50_score": float(p50),
+            "p90_score": float(p90),
+            "mean_seconds": float(seconds.mean()),
+            "capped": self.capped / len(scores),
+        }
+
+
+_game: Optional[Game] = None
+
+
+def _init_worker() -> None:
+    global _game
+    _game = Game(headless=True)
+
+
+def run_batch(
+    difficulty: Difficulty, bot: BotModel, seeds: Sequence[int], max_ticks: int
+) -> SweepResult:
+    _game.difficulty = difficulty
+    scores, ticks, capped = [], [], 0
+    for seed in seeds:
+        policy = BotPolicy(bot.reaction_time, random.Random(seed), bot.jitter)
+        result = simulate_session(_game, policy, seed, max_ticks)
+        scores.append(result.score)
+        ticks.append(result.steps)
+        capped += result.cause == "Session step limit reached"
+    return SweepResult(difficulty, bot, scores, ticks, capped)
+
+
+def parameter_grid(args: argparse.Namespace) -> List[Tuple[Difficulty, BotModel]]:
+    default = Difficulty()
+    difficulties = [
+        Difficulty(*values)
+        for values in itertools.product(
+            args.speed,
+            args.acceleration,
+            args.max_speed,
+            args.lookahead,
+            args.choice_weights or [default.choice_weights],
+            args.collection_weights or [default.collection_weights],
+        )
+    ]
+    bots = [
+        BotModel(reaction_time, jitter)
+        for reaction_time, jitter in itertools.product(args.reaction_time, args.jitter)
+    ]
+    return list(itertools.product(difficulties, bots))
+
+
+def weights(value: str) -> Tuple[float, ...]:
+    return tuple(float(weight) for weight in value.split(","))
+
+
+def main():
+    default = Difficulty()
+    parser = argparse.ArgumentParser(
+        description="Sweep difficulty parameters with bot sessions on all cores."
+    )
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-seconds", type=float, default=300)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=25)
+    parser.add_argument("--speed", type=float, nargs="+", default=[default.speed])
+    parser.add_argument(
+        "--acceleration", type=float, nargs="+", default=[default.acceleration]
+    )
+    parser.add_argument(
+        "--max-speed", type=float, nargs="+", default=[default.max_speed]
+    )
+    parser.add_argument("--lookahead", type=int, nargs="+", default=[default.lookahead])
+    parser.add_argument(
+        "--choice-weights",
+        type=weights,
+        action="append",
+        help="comma-separated weights for offering 1, 2, 3... collections",
+    )
+    parser.add_argument(
+        "--collection-weights",
+        type=weights,
+        action="append",
+        help="comma-separated spawn weights, one per collection",
+    )
+    parser.add_argument("--reaction-time", type=float, nargs="+", default=[0.4])
+    parser.add_argument("--jitter", type=float, nargs="+", default=[0.0])
+    parser.add_argument("--output", type=Path, default=Path("sweep_output.json"))
+    args = parser.parse_args()
+
+    grid = parameter_grid(args)
+    max_ticks = int(args.max_seconds * Simulation.STEP_RATE)
+    seeds = range(args.seed, args.seed + args.sessions)
+    batches = [
+        seeds[i : i + args.batch_size] for i in range(0, len(seeds), args.batch_size)
+    ]
+
+    start = perf_counter()
+    merged: Dict[int, SweepResult] = {}
+    with ProcessPoolExecutor(
+        args.workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    ) as executor:
+        futures = {
+            executor.submit(run_batch, difficulty, bot, batch, max_ticks): i
+            for i, (difficulty, bot) in enumerate(grid)
+            for batch in batches
+        }
+        for future, i in futures.items():
+            result = future.result()
+            if i in merged:
+                previous = merged[i]
+                result = previous._replace(
+                    scores=previous.scores + result.scores,
+                    ticks=previous.ticks + result.ticks,
+                    capped=previous.capped + result.capped,
+                )
+            merged[i] = result
+    wall_time = perf_counter() - start
+
+    report = []
+    for i in sorted(merged):
+        result = merged[i]
+        summary = result.summary()
+        report.append(
+            {
+                "difficulty": result.difficulty._asdict(),
+                "bot": result.bot._asdict(),
+                "summary": summary,
+                "scores": result.scores,
+            }
+        )
+        difficulty, bot = result.difficulty, result.bot
+        print(
+            f"speed {difficulty.speed:g} accel {difficulty.acceleration:g} "
+            f"max {difficulty.max_speed:g} lookahead {difficulty.lookahead} "
+            f"reaction {bot.reaction_time:g}±{bot.jitter:g}: "
+            f"score p10 {summary['p10_score']:.0f} p50 {summary['p50_score']:.0f} "
+            f"p90 {summary['p90_score']:.0f}, {summary['capped']:.0%} capped"
+        )
+    args.output.write_text(json.dumps(report, indent=2))
+
+    total_sessions = len(grid) * args.sessions
+    print(
+        f"{total_sessions} sessions in {wall_time:.1f} s "
+        f"({total_sessions / wall_time:.1f} sessions/s, {args.workers} workers)"
+    )
+
+
+if __name__ == "__main__":
+    main()
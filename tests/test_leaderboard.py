@@ -0,0 +1,97 @@
+import sqlite3
+
+from utils.leaderboard import Leaderboard, RunRecord
+
+
+def run(player, score):
+    return RunRecord(player, score, score / 10, 12.0, score // 20, score)
+
+
+def open_leaderboard(tmp_path, legacy=None):
+    return Leaderboard(tmp_path / "leaderboard.db", legacy)
+
+
+def test_records_runs_and_ranks_them(tmp_path):
+    leaderboard = open_leaderboard(tmp_path)
+    for player, score in (("a", 10), ("b", 30), ("a", 20), ("b", 5)):
+        leaderboard.record(run(player, score))
+    assert leaderboard.high_score == 30
+    leaderboard.flush()
+
+    assert [row.score for row in leaderboard.top(3)] == [30, 20, 10]
+    assert [row.score for row in leaderboard.top(5, player="b")] == [30, 5]
+    assert all(row.finished_at > 0 for row in leaderboard.top())
+    leaderboard.close()
+
+    reopened = open_leaderboard(tmp_path)
+    assert reopened.high_score == 30
+    assert len(reopened.top(10)) == 4
+    reopened.close()
+
+
+def test_migrates_a_legacy_high_score(tmp_path):
+    legacy = tmp_path / "hs.txt"
+    legacy.write_text("39\n")
+    leaderboard = open_leaderboard(tmp_path, legacy)
+
+    assert leaderboard.high_score == 39
+    assert [(row.player, row.score) for row in leaderboard.top()] == [("legacy", 39)]
+    assert not legacy.exists()
+    assert (tmp_path / "hs.txt.migrated").read_text() == "39\n"
+    leaderboard.close()
+
+    reopened = open_leaderboard(tmp_path, legacy)
+    assert len(reopened.top()) == 1
+    reopened.close()
+
+
+def test_moves_an_unreadable_legacy_file_aside(tmp_path):
+    legacy = tmp_path / "hs.txt"
+    legacy.write_text("not a score")
+    leaderboard = open_leaderboard(tmp_path, legacy)
+
+    assert leaderboard.high_score == 0
+    assert leaderboard.top() == []
+    assert not legacy.exists()
+    assert (tmp_path / "hs.txt.corrupt").read_text() == "not a score"
+    leaderboard.close()
+
+
+def test_recreates_a_corrupt_database(tmp_path):
+    path = tmp_path / "leaderboard.db"
+    path.write_bytes(b"garbage" * 1000)
+    leaderboard = open_leaderboard(tmp_path)
+
+    assert (tmp_path / "leaderboard.db.corrupt").read_bytes() == b"garbage" * 1000
+    leaderboard.record(run("a", 7))
+    leaderboard.flush()
+    assert [row.score for row in leaderboard.top()] == [7]
+    leaderboard.close()
+
+
+def test_write_errors_do_not_stop_the_writer(tmp_path, capsys):
+    leaderboard = open_leaderboard(tmp_path)
+    leaderboard.connection.execute("DROP TABLE runs")
+    leaderboard.connection.commit()
+
+    leaderboard.record(run("a", 7))
+    leaderboard.flush()
+    assert "could not save 1 runs" in capsys.readouterr().out
+    assert leaderboard.writer.is_alive()
+
+    leaderboard.connection.executescript(
+        "CREATE TABLE runs (id INTEGER PRIMARY KEY, player TEXT, score INTEGER, "
+        "duration REAL, max_speed REAL, collections_placed INTEGER, seed INTEGER, "
+        "finished_at REAL)"
+    )
+    leaderboard.record(run("a", 8))
+    leaderboard.flush()
+    assert [row.score for row in leaderboard.top()] == [8]
+    leaderboard.close()
+
+
+def test_uses_wal_journal(tmp_path):
+    open_leaderboard(tmp_path).close()
+    connection = sqlite3.connect(tmp_path / "leaderboard.db")
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    connection.close()
@@ -0,0 +1,115 @@
+import pytest
+
+from utils.quality import QUALITY_TIERS, QualityGovernor
+
+BUDGET = 1 / 60
+SLOW = BUDGET * 1.5
+FAST = BUDGET * 0.5
+STEADY = BUDGET * 0.9
+WINDOW = 10
+REFRESH = 1 / 60
+
+
+def governor(window=WINDOW, **kwargs):
+    applied = []
+    governor = QualityGovernor(applied.append, budget=BUDGET, window=window, **kwargs)
+    return governor, applied
+
+
+def feed(governor, frame_time, start, count, step=0.01):
+    changes = [governor.record(frame_time, start + i * step) for i in range(count)]
+    return [change for change in changes if change is not None]
+
+
+def test_applies_the_initial_tier():
+    _, applied = governor(initial_tier=2)
+    assert applied == [QUALITY_TIERS[2]]
+
+
+def test_waits_for_a_full_window():
+    quality, _ = governor()
+    assert feed(quality, SLOW, 10, WINDOW - 1) == []
+    assert [change.tier for change in feed(quality, SLOW, 11, 1)] == ["medium"]
+
+
+def test_downgrades_once_per_cooldown():
+    quality, applied = governor()
+    changes = feed(quality, SLOW, 10, 50)
+    assert [change.tier for change in changes] == ["medium"]
+
+    changes = feed(quality, SLOW, 10 + QualityGovernor.DOWNGRADE_COOLDOWN, 50)
+    assert [change.tier for change in changes] == ["low"]
+    assert [tier.name for tier in applied] == ["high", "medium", "low"]
+
+
+def test_does_not_downgrade_past_the_last_tier():
+    quality, _ = governor(initial_tier=len(QUALITY_TIERS) - 1)
+    assert feed(quality, SLOW, 10, 100, step=0.1) == []
+    assert quality.tier.name == "minimal"
+
+
+def test_holds_the_tier_between_thresholds():
+    quality, _ = governor(initial_tier=1)
+    assert feed(quality, STEADY, 10, 200, step=0.1) == []
+    assert quality.tier.name == "medium"
+
+
+def test_upgrades_only_after_the_longer_cooldown():
+    quality, _ = governor()
+    feed(quality, SLOW, 10, WINDOW)
+    assert quality.tier.name == "medium"
+    last_change = quality.last_change
+
+    assert feed(quality, FAST, last_change, 40, step=0.1) == []
+    changes = feed(quality, FAST, last_change + QualityGovernor.UPGRADE_COOLDOWN, 1)
+    assert [(change.previous, change.tier) for change in changes] == [
+        ("medium", "high")
+    ]
+
+
+def test_percentile_ignores_isolated_spikes():
+    quality, _ = governor(window=QualityGovernor.WINDOW)
+    frame_times = [STEADY] * 19 + [SLOW * 10]
+    for i, frame_time in enumerate(frame_times * 20):
+        assert quality.record(frame_time, 10 + i * 0.1) is None
+
+
+def test_fixed_tier_never_changes():
+    quality, applied = governor(initial_tier=1, adaptive=False)
+    feed(quality, SLOW, 10, 100, step=0.1)
+    feed(quality, FAST, 20, 100, step=0.1)
+    assert quality.changes == []
+    assert applied == [QUALITY_TIERS[1]]
+
+
+def test_reports_changes_to_the_callback():
+    reported = []
+    quality, _ = governor(on_change=reported.append)
+    feed(quality, SLOW, 10, WINDOW)
+    assert reported == quality.changes
+    assert reported[0].frame_time == SLOW
+
+
+def test_reset_restarts_the_window():
+    quality, _ = governor()
+    feed(quality, SLOW, 10, WINDOW - 1)
+    quality.reset()
+    assert feed(quality, SLOW, 11, WINDOW - 1) == []
+
+
+def test_vsync_locked_frames_upgrade_on_work_time():
+    quality, _ = governor()
+    feed(quality, SLOW, 10, WINDOW)
+    assert quality.tier.name == "medium"
+    last_change = quality.last_change
+
+    vsync_locked = [quality.record(REFRESH, last_change + i * 0.1) for i in range(100)]
+    assert vsync_locked == [None] * 100
+
+    work = FAST
+    changes = [
+        quality.record_frame(REFRESH, REFRESH - work, last_change + 10 + i * 0.1)
+        for i in range(WINDOW)
+    ]
+    assert [change.tier for change in changes if change] == ["high"]
+    assert quality.changes[-1].frame_time == pytest.approx(work)
@@ -0,0 +1,67 @@
+import pytest
+from panda3d.core import Point3F, Vec3
+
+from utils.replay import (
+    COLLECTIONS,
+    LEGACY_HEADER,
+    LEGACY_RETAINED_TRACKS,
+    MAGIC,
+    VERSION,
+    Replay,
+    layout_checksum,
+)
+from utils.track_generation import TrackList
+from utils.track_geometry import track_geometry
+
+
+def recorded(**kwargs):
+    replay = Replay(7, [], **kwargs)
+    for tick, collection in ((30, "straight"), (95, "loop"), (140, "turn_left")):
+        replay.record(tick, collection)
+    return replay._replace(ticks=200, score=61, layout=0xDEADBEEF)
+
+
+def test_stores_the_retained_track_count():
+    replay = Replay.from_bytes(recorded(retained_tracks=250).to_bytes())
+    assert replay.retained_tracks == 250
+    assert replay.version == VERSION
+
+
+def test_reads_legacy_headers():
+    data = LEGACY_HEADER.pack(MAGIC, 2, 120, 7, 200, 61, 0xDEADBEEF, 0)
+    replay = Replay.from_bytes(data)
+    assert replay.retained_tracks == LEGACY_RETAINED_TRACKS
+    assert replay.to_bytes() == data
+
+
+def test_rejects_unknown_versions():
+    data = bytearray(recorded().to_bytes())
+    data[4] = VERSION + 1
+    with pytest.raises(ValueError):
+        Replay.from_bytes(bytes(data))
+
+
+def test_round_trips_through_bytes_and_files(tmp_path):
+    replay = recorded()
+    assert Replay.from_bytes(replay.to_bytes()) == replay
+    replay.save(tmp_path / "run.replay")
+    assert Replay.load(tmp_path / "run.replay") == replay
+    assert replay.inputs() == [(30, "straight"), (95, "loop"), (140, "turn_left")]
+
+
+def test_every_collection_has_a_code():
+    replay = Replay(0, [])
+    for tick, collection in enumerate(COLLECTIONS):
+        replay.record(tick, collection)
+    assert Replay.from_bytes(replay.to_bytes()).inputs() == list(enumerate(COLLECTIONS))
+
+
+def test_layout_checksum_follows_the_tail():
+    tracks = TrackList()
+    tracks.extend(TrackList.from_geometry(track_geometry(5, 0, 0, 0), [None] * 5))
+    checksum = layout_checksum(tracks)
+    assert layout_checksum(tracks) == checksum
+    assert layout_checksum(tracks, checksum) != checksum
+
+    tracks.append(Point3F(0, 10, 0), Vec3(1, 0, 0), Vec3(0, 0, 1))
+    assert layout_checksum(tracks) != checksum
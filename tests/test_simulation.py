@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from utils.simulation import Simulation
+
+STEP_DT = 1 / Simulation.STEP_RATE
+
+
+def simulation(**kwargs):
+    return Simulation(**{"speed": 9, "acceleration": 0.4, **kwargs})
+
+
+def run(sim, frame_times):
+    for frame_dt in frame_times:
+        for _ in range(sim.advance(frame_dt)):
+            sim.step()
+    return sim
+
+
+def stepped(ticks, **kwargs):
+    sim = simulation(**kwargs)
+    for _ in range(ticks):
+        sim.step()
+    return sim
+
+
+def test_state_depends_only_on_the_tick():
+    rng = random.Random(0)
+    frame_times = [rng.choice((1 / 30, 1 / 60, 1 / 144, 0.1)) for _ in range(600)]
+    for frames in (frame_times, [sum(frame_times) / 600] * 600):
+        sim = run(simulation(), frames)
+        assert abs(sim.tick - sum(frames) / STEP_DT) <= 1
+        reference = stepped(sim.tick)
+        assert (sim.distance, sim.speed) == (reference.distance, reference.speed)
+
+
+def test_accumulates_partial_steps():
+    sim = simulation()
+    assert sim.advance(STEP_DT * 0.4) == 0
+    assert sim.alpha == pytest.approx(0.4)
+    assert sim.advance(STEP_DT * 0.7) == 1
+    assert sim.alpha == pytest.approx(0.1)
+    assert 0 <= sim.alpha < 1
+
+
+def test_caps_steps_per_frame():
+    sim = simulation()
+    assert sim.advance(10) == Simulation.MAX_STEPS_PER_FRAME
+    assert sim.accumulator == 0
+    assert sim.advance(STEP_DT) == 1
+
+
+def test_accelerates_up_to_max_speed():
+    sim = simulation(speed=19.99, acceleration=4, max_speed=20)
+    sim.step()
+    top_speed = sim.speed
+    assert top_speed == pytest.approx(19.99 + 4 * STEP_DT)
+    sim.step()
+    assert sim.speed == top_speed
+    assert sim.distance == pytest.approx((19.99 + top_speed) * STEP_DT)
+
+
+def test_tracks_index_and_interpolation():
+    sim = simulation(track_length=2)
+    while sim.distance < 2:
+        sim.step()
+    assert sim.track_index == 1
+
+    sim.advance(STEP_DT / 2)
+    assert sim.previous_distance < sim.interpolated_distance() < sim.distance
+    assert sim.interpolated_distance() == pytest.approx(
+        (sim.previous_distance + sim.distance) / 2
+    )
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from soak import grows, rises
+
+BYTE_TOLERANCE = 0.02
+BYTE_SLACK = 256 * 1024
+
+
+def test_flags_a_steady_leak():
+    leak = [1.9e6 + 25e3 * i for i in range(16)]
+    growth = grows("bytes", leak, BYTE_TOLERANCE, BYTE_SLACK)
+    assert [item.metric for item in growth] == ["bytes"]
+    objects = [60_000 + 1_000 * i for i in range(16)]
+    growth = grows("objects", objects, 0.02, 50)[0]
+    assert growth.late - growth.early == pytest.approx(15_000)
+
+
+def test_ignores_caches_that_fill_and_stop():
+    filling = [1.5e6 + min(i, 8) * 20e3 for i in range(16)]
+    assert grows("bytes", filling, BYTE_TOLERANCE, BYTE_SLACK) == []
+
+
+def test_ignores_noise():
+    rng = np.random.default_rng(0)
+    objects = (61_000 + rng.integers(-300, 300, 16)).tolist()
+    assert grows("objects", objects, 0.02, 50) == []
+    tuples = (5_000 + rng.integers(-300, 300, 16)).tolist()
+    assert rises("objects[tuple]", tuples, 0.02, 50) == []
+
+
+def test_rises_flags_a_gauge_that_steps_up():
+    assert rises("render_nodes", [4636] * 4 + [4637] * 4, 0, 0)
+    assert rises("render_nodes", [4636] * 7 + [4640], 0, 0) == []
@@ -0,0 +1,182 @@
+import numpy as np
+import pytest
+
+from main import Game
+from utils.spatial_hash import SpatialHash, point_segment_distances, segment_distances
+from utils.track_generation import COLLECTION_PARTS, Track, TrackList
+from utils.track_geometry import concatenate_geometry, track_geometry
+
+SAMPLES = np.linspace(0, 1, 401)[:, None]
+
+
+def brute_force_point_distance(point, start, end):
+    return np.linalg.norm(start + (end - start) * SAMPLES - point, axis=-1).min()
+
+
+def brute_force_segment_distance(start_a, end_a, start_b, end_b):
+    a = start_a + (end_a - start_a) * SAMPLES
+    b = start_b + (end_b - start_b) * SAMPLES
+    return np.linalg.norm(a[:, None] - b[None], axis=-1).min()
+
+
+def collection(name, num_tracks, start_pos=(0, 0, 0), initial_heading=0):
+    parts = []
+    for part in COLLECTION_PARTS[name](num_tracks):
+        parts.append(
+            track_geometry(
+                **part._asdict(),
+                initial_heading=initial_heading,
+                start_pos=start_pos,
+                length=Track.LENGTH,
+            )
+        )
+        start_pos = parts[-1].end_pos[-1]
+    return concatenate_geometry(parts)
+
+
+def indexed_tracks(geometry):
+    tracks = TrackList(maxlen=1000, spatial_index=SpatialHash())
+    tracks.extend(TrackList.from_geometry(geometry, [None] * len(geometry.start_pos)))
+    return tracks
+
+
+@pytest.mark.parametrize(
+    "start_a, end_a, start_b, end_b, expected",
+    [
+        ((0, 0, 0), (2, 0, 0), (0, 1, 0), (2, 1, 0), 1.0),
+        ((0, 0, 0), (2, 0, 0), (1, 1, 0), (3, 1, 0), 1.0),
+        ((0, 0, 0), (2, 0, 0), (3, 0, 0), (5, 0, 0), 1.0),
+        ((0, 0, 0), (2, 0, 0), (-3, 0, 0), (-1, 0, 0), 1.0),
+        ((0, 0, 0), (2, 0, 0), (1, 0, 0), (3, 0, 0), 0.0),
+        ((0, 0, 0), (2, 0, 0), (1, -1, 0), (1, 1, 0), 0.0),
+        ((0, 0, 0), (2, 0, 0), (1, -1, 1), (1, 1, 1), 1.0),
+        ((0, 0, 0), (2, 0, 0), (3, -1, 0), (3, 1, 0), 1.0),
+        ((0, 0, 0), (2, 0, 0), (-1, 2, 0), (-1, 4, 0), np.sqrt(5)),
+    ],
+)
+def test_segment_distance_special_cases(start_a, end_a, start_b, end_b, expected):
+    segments = [
+        np.array(point, dtype=float) for point in (start_a, end_a, start_b, end_b)
+    ]
+    assert segment_distances(*segments) == pytest.approx(expected, abs=1e-9)
+    assert segment_distances(*segments[2:], *segments[:2]) == pytest.approx(
+        expected, abs=1e-9
+    )
+
+
+def test_segment_distances_match_brute_force():
+    rng = np.random.default_rng(0)
+    start_a = rng.uniform(-3, 3, (300, 3))
+    end_a = start_a + rng.uniform(-2, 2, (300, 3))
+    start_b = rng.uniform(-3, 3, (300, 3))
+    end_b = start_b + rng.uniform(-2, 2, (300, 3))
+    end_b[:50] = start_b[:50] + (end_a[:50] - start_a[:50]) * rng.uniform(
+        -1, 1, (50, 1)
+    )
+
+    distances = segment_distances(start_a, end_a, start_b, end_b)
+    expected = [
+        brute_force_segment_distance(*segments)
+        for segments in zip(start_a, end_a, start_b, end_b)
+    ]
+    np.testing.assert_allclose(distances, expected, atol=2e-2)
+    assert (distances <= np.array(expected) + 1e-9).all()
+
+
+def test_point_segment_distances_match_brute_force():
+    rng = np.random.default_rng(1)
+    points = rng.uniform(-4, 4, (300, 3))
+    starts = rng.uniform(-2, 2, (300, 3))
+    ends = starts + rng.uniform(-2, 2, (300, 3))
+
+    distances = point_segment_distances(points, starts, ends)
+    expected = [brute_force_point_distance(*args) for args in zip(points, starts, ends)]
+    np.testing.assert_allclose(distances, expected, atol=1e-2)
+
+
+def test_cell_size_covers_track_length_and_clearance():
+    assert Track.LENGTH + Game.OVERLAP_CLEARANCE < SpatialHash.CELL_SIZE
+
+
+def test_near_finds_every_segment_within_a_cell():
+    geometry = concatenate_geometry(
+        [
+            collection("turn_left", 18),
+            collection("loop", 40, (0, 40, 0)),
+            collection("ramp_up", 10, (20, 0, 0), 90),
+        ]
+    )
+    tracks = indexed_tracks(geometry)
+    radius = SpatialHash.CELL_SIZE - Track.LENGTH / 2
+    rng = np.random.default_rng(2)
+    low = geometry.start_pos.min(0) - radius
+    high = geometry.start_pos.max(0) + radius
+    for point in rng.uniform(low, high, (500, 3)):
+        distances = point_segment_distances(point, geometry.start_pos, geometry.end_pos)
+        near = tracks.spatial_index.near(point)
+        assert set(np.flatnonzero(distances < radius).tolist()) <= near
+
+
+def test_spatial_hash_remove_and_clear():
+    spatial_hash = SpatialHash()
+    starts = np.array([[0.0, 0, 0], [10, 0, 0]])
+    spatial_hash.insert((0, 1), starts, starts + (0, Track.LENGTH, 0))
+    assert spatial_hash.near(np.array([0.0, 1, 0])) == {0}
+
+    spatial_hash.remove(0)
+    assert spatial_hash.near(np.array([0.0, 1, 0])) == set()
+    assert len(spatial_hash) == 1
+
+    spatial_hash.clear()
+    assert len(spatial_hash) == 0
+    assert not spatial_hash.cells
+
+
+def test_loop_overlaps_a_copy_of_itself():
+    loop = collection("loop", 40)
+    tracks = indexed_tracks(loop)
+    clearance = Game.OVERLAP_CLEARANCE
+
+    def overlaps(offset):
+        moved = loop.translated(offset)
+        return tracks.overlaps(
+            moved.start_pos,
+            moved.end_pos,
+            clearance,
+            tracks.first_index,
+            tracks.next_index,
+        )
+
+    assert overlaps((0.5, 0, 0))
+    assert overlaps((0, 0, 20))
+    assert not overlaps((40, 0, 0))
+
+    rng = np.random.default_rng(3)
+    results = []
+    for offset in rng.uniform(-8, 8, (60, 3)):
+        moved = loop.translated(offset)
+        distance = segment_distances(
+            moved.start_pos[:, None],
+            moved.end_pos[:, None],
+            loop.start_pos[None],
+            loop.end_pos[None],
+        ).min()
+        assert overlaps(offset) == (distance < clearance)
+        results.append(distance < clearance)
+    assert any(results) and not all(results)
+
+
+def test_overlaps_respects_the_index_window():
+    loop = collection("loop", 40)
+    tracks = indexed_tracks(loop)
+    moved = loop.translated((0.5, 0, 0))
+    assert not tracks.overlaps(
+        moved.start_pos, moved.end_pos, Game.OVERLAP_CLEARANCE, 0, 0
+    )
+    assert not tracks.overlaps(
+        moved.start_pos[:1],
+        moved.end_pos[:1],
+        Game.OVERLAP_CLEARANCE,
+        10,
+        tracks.next_index,
+    )
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from panda3d.core import NodePath, Quat, Vec3
+
+from utils.track_generation import COLLECTION_LENGTHS, COLLECTION_PARTS, Track
+from utils.track_geometry import PITCH_AXES, track_geometry
+
+from tests.test_spatial_hash import collection
+
+
+def scene_graph_geometry(
+    num_tracks,
+    del_pitch_deg,
+    del_heading_deg,
+    initial_heading,
+    is_loop=False,
+    start_pos=(0, 0, 0),
+):
+    render = NodePath("render")
+    pitch_deg = 0
+    heading_deg = initial_heading % 360
+    normal_rotation = Quat()
+    normal_rotation.setFromAxisAngle(del_pitch_deg, Vec3(*PITCH_AXES[heading_deg]))
+    normal = Vec3(0, 0, 1)
+    start_pos = Vec3(*start_pos)
+
+    starts, directions, normals = [], [], []
+    for i in range(num_tracks):
+        track_dummy_node = render.attachNewNode("track_dummy_node")
+        track = track_dummy_node.attachNewNode("track")
+        track.set_pos(0, Track.LENGTH / 2, 0)
+        track_dummy_node.set_pos(start_pos)
+        track_dummy_node.set_h(heading_deg)
+        track_dummy_node.set_p(pitch_deg)
+        direction = Vec3(
+            track.getPos(render) - track_dummy_node.getPos(render)
+        ).normalized()
+
+        starts.append(tuple(track_dummy_node.getPos(render)))
+        directions.append(tuple(direction))
+        normals.append(tuple(normal))
+        start_pos = start_pos + direction * Track.LENGTH
+        normal = normal_rotation.xform(normal)
+        pitch_deg += del_pitch_deg
+        if not is_loop or i < num_tracks // 2:
+            heading_deg += del_heading_deg
+        else:
+            heading_deg -= del_heading_deg
+    return np.array(starts), np.array(directions), np.array(normals)
+
+
+@pytest.mark.parametrize("initial_heading", [0, 90, 180, 270, 450])
+@pytest.mark.parametrize("name", sorted(COLLECTION_PARTS))
+def test_matches_the_scene_graph(name, initial_heading):
+    num_tracks = COLLECTION_LENGTHS[name][-1]
+    for part in COLLECTION_PARTS[name](num_tracks):
+        start_pos = (3.0, -7.0, 5.0)
+        geometry = track_geometry(
+            **part._asdict(),
+            initial_heading=initial_heading,
+            start_pos=start_pos,
+            length=Track.LENGTH,
+        )
+        starts, directions, normals = scene_graph_geometry(
+            **part._asdict(), initial_heading=initial_heading, start_pos=start_pos
+        )
+        np.testing.assert_allclose(geometry.start_pos, starts, atol=1e-4)
+        np.testing.assert_allclose(geometry.direction, directions, atol=1e-5)
+        np.testing.assert_allclose(geometry.normal, normals, atol=1e-5)
+        np.testing.assert_allclose(
+            geometry.end_pos, geometry.start_pos + geometry.direction * Track.LENGTH
+        )
+
+
+def test_collections_are_continuous():
+    for name, lengths in COLLECTION_LENGTHS.items():
+        geometry = collection(name, lengths[-1], start_pos=(1, 2, 3))
+        np.testing.assert_allclose(geometry.start_pos[0], (1, 2, 3))
+        np.testing.assert_allclose(geometry.start_pos[1:], geometry.end_pos[:-1])
+
+
+def test_translated_moves_positions_only():
+    geometry = track_geometry(10, 5, 0, 90)
+    moved = geometry.translated((1, 2, 3))
+    np.testing.assert_allclose(moved.start_pos - geometry.start_pos, [[1, 2, 3]] * 10)
+    np.testing.assert_allclose(moved.end_pos - geometry.end_pos, [[1, 2, 3]] * 10)
+    assert moved.direction is geometry.direction
+    assert moved.normal is geometry.normal
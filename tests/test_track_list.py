@@ -0,0 +1,143 @@
+import random
+from collections import deque
+
+import numpy as np
+import pytest
+from panda3d.core import NodePath, Point3F, Vec3
+
+from utils.node_pool import NodePool
+from utils.track_generation import Track, TrackBatch, TrackList
+from utils.track_geometry import track_geometry
+
+DIRECTION = Vec3(0, 1, 0)
+NORMAL = Vec3(0, 0, 1)
+
+
+def append(tracks, x, node_path=None):
+    tracks.append(Point3F(x, 0, 0), DIRECTION, NORMAL, node_path)
+
+
+def collection(start_x, num_tracks):
+    geometry = track_geometry(num_tracks, 0, 0, 0, start_pos=(start_x, 0, 0))
+    return TrackList.from_geometry(
+        geometry, [NodePath(f"{start_x}") for _ in range(num_tracks)]
+    )
+
+
+def check(tracks, model):
+    assert len(tracks) == len(model)
+    assert tracks.next_index - tracks.first_index == len(model)
+    if not model:
+        return
+    start_pos, node_names = zip(*model)
+    arrays = tracks[tracks.first_index : tracks.next_index]
+    np.testing.assert_allclose(arrays.start_pos, start_pos, atol=1e-9)
+    np.testing.assert_allclose(
+        arrays.end_pos, arrays.start_pos + arrays.direction * Track.LENGTH
+    )
+    slots = tracks.slots(tracks.first_index, tracks.next_index)
+    assert [node.get_name() for node in tracks.node_paths[slots]] == list(node_names)
+
+
+@pytest.mark.parametrize("maxlen", [None, 7, 64])
+def test_matches_a_deque(maxlen):
+    rng = random.Random(maxlen)
+    tracks = TrackList(maxlen=maxlen, capacity=4)
+    model = deque(maxlen=maxlen)
+    x = 0
+    for _ in range(500):
+        operation = rng.random()
+        if operation < 0.5:
+            append(tracks, x, NodePath(f"{x}"))
+            model.append(((x, 0, 0), f"{x}"))
+            x += 1
+        elif operation < 0.8:
+            num_tracks = rng.randint(1, 20)
+            tracks.extend(collection(x, num_tracks))
+            model.extend(((x, 2 * i, 0), f"{x}") for i in range(num_tracks))
+            x += 1
+        elif model:
+            tracks.popleft()
+            model.popleft()
+        check(tracks, model)
+    assert tracks.capacity >= len(tracks)
+
+
+def test_slots_wrap_around():
+    tracks = TrackList(maxlen=5)
+    for x in range(13):
+        append(tracks, x)
+    assert (tracks.first_index, tracks.next_index) == (8, 13)
+    assert tracks.slot(12) == 12 % 5
+    assert tracks.slots(8, 13).tolist() == [3, 4, 0, 1, 2]
+    assert [track.start_pos.x for track in tracks] == [8, 9, 10, 11, 12]
+    with pytest.raises(IndexError):
+        tracks.slot(7)
+    assert tracks.get(13) is None
+
+
+def test_reserve_grows_unbounded_lists_in_place():
+    tracks = TrackList(capacity=4)
+    for x in range(3):
+        append(tracks, x)
+    tracks.popleft()
+    tracks.extend(collection(10, 9))
+    assert tracks.capacity == 16
+    assert tracks.first_index == 1
+    assert [track.start_pos.x for track in tracks][:3] == [1, 2, 10]
+    assert tracks.tail.end_pos.y == pytest.approx(9 * Track.LENGTH)
+
+
+def test_extend_takes_ownership_of_nodes():
+    root = NodePath("render")
+    pool = NodePool(lambda: NodePath("track"))
+    tracks = TrackList(maxlen=10, node_pool=pool)
+    other = collection(0, 4)
+    nodes = [root.attachNewNode(f"{i}") for i in range(4)]
+    other.node_paths[:4] = nodes
+    batch = TrackBatch(root.attachNewNode("batch"), 4)
+    other.batches[:4] = batch
+
+    tracks.extend(other)
+    assert len(other) == 0
+    assert other.first_index == other.next_index == 4
+    assert other.node_paths.tolist()[:4] == [None] * 4
+    assert other.batches.tolist()[:4] == [None] * 4
+    other.clear()
+    assert [track.node_path for track in tracks] == nodes
+    assert all(not node.isEmpty() for node in nodes)
+
+    tracks.clear()
+    assert batch.node_path.isEmpty()
+    assert pool.free == []
+
+
+def test_extend_keeps_the_newest_tracks_of_an_oversized_collection():
+    tracks = TrackList(maxlen=5)
+    tracks.extend(collection(0, 8))
+    assert (tracks.first_index, tracks.next_index) == (0, 5)
+    assert [track.start_pos.y for track in tracks] == [6, 8, 10, 12, 14]
+
+
+def test_popleft_returns_nodes_to_the_pool():
+    root = NodePath("render")
+    pool = NodePool(lambda: NodePath("track"))
+    tracks = TrackList(maxlen=3, node_pool=pool)
+    for x in range(4):
+        append(tracks, x, pool.acquire(root))
+    assert len(pool.free) == 1
+    assert not pool.free[0].hasParent()
+    with pytest.raises(IndexError):
+        TrackList().popleft()
+
+
+def test_slices_follow_track_indices():
+    tracks = TrackList(maxlen=6)
+    for x in range(10):
+        append(tracks, x)
+    arrays = tracks[5:9]
+    assert arrays.start_pos[:, 0].tolist() == [5, 6, 7, 8]
+    assert tracks[0:6].start_pos[:, 0].tolist() == [4, 5]
+    assert tracks[4::2].start_pos[:, 0].tolist() == [4, 6, 8]
+    np.testing.assert_allclose(arrays.end_pos - arrays.start_pos, [[0, 2, 0]] * 4)
+    assert np.array_equal(arrays.normal, [[0, 0, 1]] * 4)
@@ -0,0 +1,64 @@
+import pytest
+from panda3d.core import NodePath, Point3F, Vec3
+
+from main import Game
+from utils.difficulty import Difficulty
+from utils.node_pool import NodePool
+from utils.track_generation import (
+    COLLECTION_LENGTHS,
+    MAX_COLLECTION_TRACKS,
+    TrackList,
+)
+from utils.visibility import TrackVisibility
+
+from tests.test_spatial_hash import collection
+
+
+def append_tracks(tracks, pool, root, count):
+    for _ in range(count):
+        tracks.append(
+            Point3F(0, 0, 0), Vec3(0, 1, 0), Vec3(0, 0, 1), pool.acquire(root)
+        )
+
+
+def test_stashes_tracks_outside_the_window():
+    root = NodePath("render")
+    tracks = TrackList(maxlen=100, node_pool=NodePool(lambda: NodePath("track")))
+    append_tracks(tracks, tracks.node_pool, root, 50)
+    visibility = TrackVisibility(tracks, ahead=10, behind=5)
+
+    assert visibility.update(20)
+    assert not visibility.update(20)
+    hidden = [tracks[i].node_path.isStashed() for i in range(50)]
+    assert hidden == [True] * 15 + [False] * 15 + [True] * 20
+
+
+def test_evicting_visible_tracks_returns_them_to_the_pool():
+    root = NodePath("render")
+    pool = NodePool(lambda: NodePath("track"))
+    tracks = TrackList(maxlen=30, node_pool=pool)
+    append_tracks(tracks, pool, root, 30)
+    visibility = TrackVisibility(tracks, ahead=10, behind=20)
+    visibility.update(25)
+
+    evicted = tracks[0].node_path
+    tracks.popleft()
+    assert pool.free == [evicted]
+    assert not evicted.hasParent()
+    assert visibility.update(26)
+
+    append_tracks(tracks, pool, root, 12)
+    assert visibility.update(27)
+    for index in range(tracks.first_index, tracks.next_index):
+        assert tracks[index].node_path.isStashed() == (index >= 37)
+
+
+def test_min_retained_tracks_fits_every_collection():
+    for name, lengths in COLLECTION_LENGTHS.items():
+        for num_tracks in lengths:
+            assert len(collection(name, num_tracks).start_pos) <= MAX_COLLECTION_TRACKS
+    assert Game.min_retained_tracks(Difficulty()) == (
+        MAX_COLLECTION_TRACKS + Difficulty().lookahead + TrackVisibility.BEHIND
+    )
+    with pytest.raises(ValueError):
+        Game(headless=True, retained_tracks=Game.min_retained_tracks(Difficulty()) - 1)
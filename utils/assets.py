@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path, PurePosixPath
+
+from direct.showbase.Loader import Loader
+from panda3d.core import Filename, Texture, VirtualFileSystem
+
+if getattr(sys, "frozen", False):
+    GAME_DIR = Path(Filename.expand_from("$MAIN_DIR").to_os_specific())
+else:
+    GAME_DIR = Path(__file__).resolve().parent.parent
+BAKED_MULTIFILE = GAME_DIR / "assets.mf"
+MOUNT_POINT = Filename.from_os_specific(str(GAME_DIR / "baked")).get_fullpath()
+
+SKYBOX = "assets/skybox/sky_#.png"
+BAKED_SKYBOX = "assets/skybox/sky.txo"
+MUSIC = "assets/music/Guitar-Mayhem-3.wav"
+BAKED_SUFFIXES = {".png": ".txo", ".wav": ".ogg"}
+
+
+def baked_name(path: str) -> str:
+    if path == SKYBOX:
+        return BAKED_SKYBOX
+    path = PurePosixPath(path)
+    return str(path.with_suffix(BAKED_SUFFIXES.get(path.suffix, path.suffix)))
+
+
+def mount_baked_assets(multifile: Path = BAKED_MULTIFILE) -> bool:
+    vfs = VirtualFileSystem.get_global_ptr()
+    if vfs.is_directory(MOUNT_POINT):
+        return True
+    if not multifile.exists():
+        return False
+    return vfs.mount(
+        Filename.from_os_specific(str(multifile)),
+        MOUNT_POINT,
+        VirtualFileSystem.MF_read_only,
+    )
+
+
+def asset_path(path: str) -> str:
+    baked = f"{MOUNT_POINT}/{baked_name(path)}"
+    if VirtualFileSystem.get_global_ptr().exists(baked):
+        return baked
+    return path
+
+
+def load_cube_map(loader: Loader, pattern: str = SKYBOX) -> Texture:
+    path = asset_path(pattern)
+    if path == pattern:
+        return loader.loadCubeMap(pattern)
+    return loader.loadTexture(path)
@@ -0,0 +1,10 @@
+from typing import NamedTuple, Tuple
+
+
+class Difficulty(NamedTuple):
+    speed: float = 9
+    acceleration: float = 0.4
+    max_speed: float = 20
+    lookahead: int = 10
+    choice_weights: Tuple[float, ...] = (0.1, 0.8, 0.1)
+    collection_weights: Tuple[float, ...] = (0.18, 0.18, 0.18, 0.18, 0.18, 0.07)
@@ -0,0 +1,132 @@
+from typing import Optional
+
+import numpy as np
+from panda3d.core import (
+    Geom,
+    GeomNode,
+    GeomPoints,
+    GeomVertexData,
+    GeomVertexFormat,
+    NodePath,
+    TransparencyAttrib,
+)
+
+from utils.difficulty import Difficulty
+from utils.replay import Replay
+from utils.simulation import Simulation
+from utils.track_generation import Track, TrackList
+
+
+class GhostRiders:
+    COLOR = (1, 1, 1, 0.5)
+    POINT_SIZE = 0.6
+    RIDE_HEIGHT = 0.5
+
+    def __init__(self, parent: NodePath, step_rate: int = Simulation.STEP_RATE):
+        self.step_dt = 1 / step_rate
+        self.tick = 0
+        self.distance = np.zeros(0)
+        self.previous_distance = np.zeros(0)
+        self.speed = np.zeros(0)
+        self.acceleration = np.zeros(0)
+        self.max_speed = np.zeros(0)
+        self.end_tick = np.zeros(0, dtype=np.int64)
+        self.shown = 0
+
+        self.vertex_data = GeomVertexData(
+            "ghost_riders", GeomVertexFormat.get_v3(), Geom.UH_dynamic
+        )
+        self.points = GeomPoints(Geom.UH_dynamic)
+        geom = Geom(self.vertex_data)
+        geom.add_primitive(self.points)
+        node = GeomNode("ghost_riders")
+        node.add_geom(geom)
+        self.node_path = parent.attachNewNode(node)
+        self.node_path.set_render_mode_thickness(self.POINT_SIZE)
+        self.node_path.set_render_mode_perspective(True)
+        self.node_path.set_color(self.COLOR)
+        self.node_path.set_transparency(TransparencyAttrib.M_alpha)
+        self.node_path.set_light_off()
+        self.node_path.hide()
+
+    def add(self, difficulty: Difficulty, ticks: Optional[int] = None) -> None:
+        self.distance = np.append(self.distance, 0.0)
+        self.previous_distance = np.append(self.previous_distance, 0.0)
+        self.speed = np.append(self.speed, difficulty.speed)
+        self.acceleration = np.append(self.acceleration, difficulty.acceleration)
+        self.max_speed = np.append(self.max_speed, difficulty.max_speed)
+        self.end_tick = np.append(
+            self.end_tick, np.iinfo(np.int64).max if ticks is None else ticks
+        )
+
+    def add_replay(self, replay: Replay, difficulty: Difficulty) -> None:
+        self.add(difficulty, replay.ticks)
+
+    def clear(self) -> None:
+        self.tick = 0
+        for name in (
+            "distance",
+            "previous_distance",
+            "speed",
+            "acceleration",
+            "max_speed",
+            "end_tick",
+        ):
+            setattr(self, name, getattr(self, name)[:0])
+        self._show(0)
+
+    def _show(self, count: int) -> None:
+        if count == self.shown:
+            return
+        self.shown = count
+        self.vertex_data.unclean_set_num_rows(count)
+        self.points.clear_vertices()
+        if count:
+            self.points.add_consecutive_vertices(0, count)
+            self.node_path.show()
+        else:
+            self.node_path.hide()
+
+    def step(self, steps: int) -> None:
+        if not len(self):
+            self.tick += steps
+            return
+        for _ in range(steps):
+            riding = self.tick < self.end_tick
+            self.previous_distance = self.distance
+            self.distance = np.where(
+                riding, self.distance + self.speed * self.step_dt, self.distance
+            )
+            self.speed = np.where(
+                riding & (self.speed < self.max_speed),
+                self.speed + self.acceleration * self.step_dt,
+                self.speed,
+            )
+            self.tick += 1
+
+    def update(self, tracks: TrackList, alpha: float = 1.0) -> None:
+        if not len(self) or not len(tracks):
+            self._show(0)
+            return
+        distance = (
+            self.previous_distance + (self.distance - self.previous_distance) * alpha
+        )
+        index = (distance // Track.LENGTH).astype(np.int64)
+        retained = (index >= tracks.first_index) & (index < tracks.next_index)
+        index = index[retained]
+        self._show(len(index))
+        if not len(index):
+            return
+        offset = distance[retained] - index * Track.LENGTH
+        slots = index % tracks.capacity
+        positions = (
+            tracks.start_pos[slots]
+            + tracks.direction[slots] * offset[:, None]
+            + tracks.normal[slots] * self.RIDE_HEIGHT
+        )
+        memoryview(self.vertex_data.modify_array(0)).cast("B")[:] = positions.astype(
+            np.float32
+        ).tobytes()
+
+    def __len__(self):
+        return len(self.distance)
@@ -0,0 +1,168 @@
+import json
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from direct.task.Task import Task
+from panda3d.core import ClockObject, NodePath
+
+SEGMENTS = {
+    "event_queue": ("input", "dispatch"),
+    "place_track": ("dispatch", "placed"),
+    "first_draw": ("placed", "drawn"),
+    "total": ("start", "drawn"),
+}
+REAL_TIME_MODES = (
+    ClockObject.MNormal,
+    ClockObject.MLimited,
+    ClockObject.MIntegerLimited,
+)
+BUCKETS = (0.001, 0.002, 0.004, 0.008, 0.016, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class LatencyTrace:
+    __slots__ = ("collection", "stamps", "node_path")
+
+    def __init__(self, collection: str, stamps: Dict[str, float]):
+        self.collection = collection
+        self.stamps = stamps
+        self.node_path: Optional[NodePath] = None
+
+    def segment(self, start: str, stop: str) -> Optional[float]:
+        if start not in self.stamps or stop not in self.stamps:
+            return None
+        return self.stamps[stop] - self.stamps[start]
+
+
+def histogram(
+    samples: Sequence[float], buckets: Sequence[float] = BUCKETS
+) -> List[int]:
+    return np.bincount(
+        np.searchsorted(buckets, samples, side="right"), minlength=len(buckets) + 1
+    ).tolist()
+
+
+def bucket_labels(buckets: Sequence[float] = BUCKETS) -> List[str]:
+    edges = [f"{edge * 1e3:g}" for edge in buckets]
+    return (
+        [f"<{edges[0]} ms"]
+        + [f"{low}-{high} ms" for low, high in zip(edges, edges[1:])]
+        + [f">={edges[-1]} ms"]
+    )
+
+
+def summarize(samples: Sequence[float], budget: float) -> Dict[str, float]:
+    samples = np.array(samples)
+    if not len(samples):
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+    return {
+        "count": len(samples),
+        "mean": float(samples.mean()),
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "max": float(samples.max()),
+        "over_budget": int((samples > budget).sum()),
+    }
+
+
+class LatencyTracer:
+    BUDGET = 0.1
+    HISTORY = 4096
+
+    def __init__(
+        self, render: NodePath, budget: float = BUDGET, history: int = HISTORY
+    ):
+        self.render = render
+        self.budget = budget
+        self.pending: List[LatencyTrace] = []
+        self.samples: Dict[str, Deque[float]] = {
+            segment: deque(maxlen=history) for segment in SEGMENTS
+        }
+        self.dropped = 0
+
+    @staticmethod
+    def now() -> float:
+        return ClockObject.getGlobalClock().getRealTime()
+
+    def begin(
+        self, collection: str, input_time: Optional[float] = None
+    ) -> LatencyTrace:
+        now = self.now()
+        stamps = {"start": now, "dispatch": now}
+        if (
+            input_time is not None
+            and ClockObject.getGlobalClock().getMode() in REAL_TIME_MODES
+        ):
+            stamps["start"] = stamps["input"] = input_time
+        return LatencyTrace(collection, stamps)
+
+    def placed(self, trace: LatencyTrace, node_path: Optional[NodePath]) -> None:
+        trace.stamps["placed"] = self.now()
+        trace.node_path = node_path
+        if node_path is None:
+            self.dropped += 1
+            return
+        self.pending.append(trace)
+
+    def cancel(self) -> None:
+        self.dropped += len(self.pending)
+        self.pending.clear()
+
+    def frame_task(self, _task):
+        if not self.pending:
+            return Task.cont
+        now = self.now()
+        pending = []
+        for trace in self.pending:
+            node_path = trace.node_path
+            if node_path.isEmpty() or node_path.getTop() != self.render:
+                self.dropped += 1
+            elif node_path.isStashed():
+                pending.append(trace)
+            else:
+                trace.stamps["drawn"] = now
+                self.finish(trace)
+        self.pending = pending
+        return Task.cont
+
+    def finish(self, trace: LatencyTrace) -> None:
+        for segment, (start, stop) in SEGMENTS.items():
+            seconds = trace.segment(start, stop)
+            if seconds is not None:
+                self.samples[segment].append(seconds)
+        trace.node_path = None
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            segment: summarize(samples, self.budget)
+            for segment, samples in self.samples.items()
+        }
+
+    def dump(self, path: Path) -> None:
+        Path(path).write_text(
+            json.dumps(
+                {
+                    "budget": self.budget,
+                    "buckets": BUCKETS,
+                    "dropped": self.dropped,
+                    "summary": self.summary(),
+                    "histograms": {
+                        segment: histogram(samples)
+                        for segment, samples in self.samples.items()
+                    },
+                    "samples": {
+                        segment: list(samples)
+                        for segment, samples in self.samples.items()
+                    },
+                },
+                indent=2,
+            )
+        )
+
+
+def load_latency(path: Path) -> Tuple[float, Dict[str, List[float]]]:
+    report = json.loads(Path(path).read_text())
+    return report["budget"], report["samples"]
@@ -0,0 +1,150 @@
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+from time import time
+from typing import List, NamedTuple, Optional
+
+LEADERBOARD_FILE = Path("leaderboard.db")
+LEGACY_HIGH_SCORE_FILE = Path("hs.txt")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    max_speed REAL NOT NULL,
+    collections_placed INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (score DESC);
+CREATE INDEX IF NOT EXISTS runs_by_player ON runs (player, score DESC);
+"""
+COLUMNS = "player, score, duration, max_speed, collections_placed, seed, finished_at"
+
+
+class RunRecord(NamedTuple):
+    player: str
+    score: int
+    duration: float
+    max_speed: float
+    collections_placed: int
+    seed: int
+    finished_at: float = 0.0
+
+
+class Leaderboard:
+    def __init__(
+        self,
+        path: Path = LEADERBOARD_FILE,
+        legacy_path: Optional[Path] = LEGACY_HIGH_SCORE_FILE,
+    ):
+        self.path = Path(path)
+        self.connection = self._open()
+        if legacy_path is not None:
+            self._migrate(Path(legacy_path))
+        self.high_score = self.connection.execute(
+            "SELECT COALESCE(MAX(score), 0) FROM runs"
+        ).fetchone()[0]
+
+        self.pending: "queue.Queue[Optional[RunRecord]]" = queue.Queue()
+        self.writer = threading.Thread(
+            target=self._write_behind, name="leaderboard_writer", daemon=True
+        )
+        self.writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _open(self) -> sqlite3.Connection:
+        try:
+            return self._create()
+        except sqlite3.DatabaseError as error:
+            corrupt = self.path.with_name(self.path.name + ".corrupt")
+            print(f"{self.path} is unreadable ({error}), moving it to {corrupt}")
+            self.path.replace(corrupt)
+            return self._create()
+
+    def _create(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+        except sqlite3.DatabaseError:
+            connection.close()
+            raise
+        return connection
+
+    def _migrate(self, legacy_path: Path) -> None:
+        if not legacy_path.exists():
+            return
+        try:
+            high_score = int(legacy_path.read_text().strip())
+        except (OSError, ValueError):
+            legacy_path.replace(legacy_path.with_name(legacy_path.name + ".corrupt"))
+            return
+        if high_score > 0:
+            with self.connection:
+                self.connection.execute(
+                    f"INSERT INTO runs ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    RunRecord("legacy", high_score, 0.0, 0.0, 0, 0, time()),
+                )
+        legacy_path.replace(legacy_path.with_name(legacy_path.name + ".migrated"))
+
+    def record(self, run: RunRecord) -> None:
+        if not run.finished_at:
+            run = run._replace(finished_at=time())
+        self.high_score = max(self.high_score, run.score)
+        self.pending.put(run)
+
+    def _write_behind(self) -> None:
+        connection = self._connect()
+        running = True
+        while running:
+            runs = [self.pending.get()]
+            while True:
+                try:
+                    runs.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            running = None not in runs
+            try:
+                with connection:
+                    connection.executemany(
+                        f"INSERT INTO runs ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [run for run in runs if run is not None],
+                    )
+            except sqlite3.Error as error:
+                print(f"could not save {len(runs)} runs to {self.path}: {error}")
+            finally:
+                for _ in runs:
+                    self.pending.task_done()
+        connection.close()
+
+    def flush(self) -> None:
+        self.pending.join()
+
+    def top(self, n: int = 10, player: Optional[str] = None) -> List[RunRecord]:
+        if player is None:
+            rows = self.connection.execute(
+                f"SELECT {COLUMNS} FROM runs ORDER BY score DESC LIMIT ?", (n,)
+            )
+        else:
+            rows = self.connection.execute(
+                f"SELECT {COLUMNS} FROM runs WHERE player = ? "
+                "ORDER BY score DESC LIMIT ?",
+                (player, n),
+            )
+        return [RunRecord(*row) for row in rows]
+
+    def close(self) -> None:
+        if self.writer.is_alive():
+            self.pending.put(None)
+            self.writer.join()
+        self.connection.close()
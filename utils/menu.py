@@ -7,8 +7,8 @@ from direct.gui import DirectGuiGlobals as DDG
 class Menu:
     def __init__(self, menu_items: Dict[str, Tuple[Callable, Tuple[float, float]]]):
 
-        self.buttons = [
-            DirectButton(
+        self.buttons = {
+            text: DirectButton(
                 text=text,
                 command=self.dispatch,
                 extraArgs=[func],
@@ -22,11 +22,19 @@ class Menu:
                 text_shadow=(0, 0.0425, 0.0625, 1),
             )
             for text, (func, (x, z)) in reversed(list(menu_items.items()))
-        ]
+        }
 
     def destroy(self):
-        for button in self.buttons:
+        for button in self.buttons.values():
             button.destroy()
+        self.buttons.clear()
+
+    def set_enabled(self, text: str, enabled: bool):
+        button = self.buttons.get(text)
+        if button is None:
+            return
+        button["state"] = DDG.NORMAL if enabled else DDG.DISABLED
+        button.set_color_scale((1, 1, 1, 1) if enabled else (0.5, 0.5, 0.5, 1))
 
     def dispatch(self, func):
         func()
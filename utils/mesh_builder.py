@@ -0,0 +1,189 @@
+from typing import List, Tuple
+
+import numpy as np
+from panda3d.core import (
+    Geom,
+    GeomNode,
+    GeomTriangles,
+    GeomVertexData,
+    GeomVertexFormat,
+    NodePath,
+)
+
+from utils.track_geometry import TrackGeometry
+
+RAIL_COLOR = (0, 0.46, 1, 1)
+TIE_COLOR = (0, 0, 0, 1)
+
+TUBES: Tuple[Tuple[float, float, float], ...] = (
+    (-0.5, 0, 0.075),
+    (0.5, 0, 0.075),
+    (0, -0.15, 0.1),
+)
+TUBE_SIDES = 8
+TIE_SIZE = (1.15, 0.2, 0.05)
+TIE_OFFSET = (1.0, -0.075)
+
+MeshArrays = Tuple[np.ndarray, np.ndarray]
+
+VERTEX_DTYPE = np.dtype(
+    [("vertex", "<f4", 3), ("normal", "<f4", 3), ("color", "u1", 4)]
+)
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def joint_frames(
+    geometry: TrackGeometry,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    position = np.concatenate((geometry.start_pos, geometry.end_pos[-1:]))
+    forward = np.concatenate(
+        (geometry.direction[:1], geometry.direction, geometry.direction[-1:])
+    )
+    up = np.concatenate((geometry.normal[:1], geometry.normal, geometry.normal[-1:]))
+    forward = _normalized(forward[:-1] + forward[1:])
+    up = _normalized(up[:-1] + up[1:])
+    right = _normalized(np.cross(forward, up))
+    up = np.cross(right, forward)
+    return position, forward, right, up
+
+
+def _tube(
+    position: np.ndarray,
+    right: np.ndarray,
+    up: np.ndarray,
+    x: float,
+    z: float,
+    radius: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    angles = np.linspace(0, 2 * np.pi, TUBE_SIDES, endpoint=False)
+    ring = (
+        np.cos(angles)[None, :, None] * right[:, None]
+        + np.sin(angles)[None, :, None] * up[:, None]
+    )
+    center = position + right * x + up * z
+    vertices = center[:, None] + ring * radius
+
+    joint = np.arange(len(position) - 1)[:, None] * TUBE_SIDES
+    side = np.arange(TUBE_SIDES)[None, :]
+    a = joint + side
+    b = joint + (side + 1) % TUBE_SIDES
+    c = b + TUBE_SIDES
+    d = a + TUBE_SIDES
+    triangles = np.stack((a, c, b, a, d, c), axis=-1).reshape(-1, 3)
+    return vertices.reshape(-1, 3), ring.reshape(-1, 3), triangles
+
+
+def _ties(
+    geometry: TrackGeometry,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    width, depth, height = TIE_SIZE
+    along, z = TIE_OFFSET
+    forward = geometry.direction
+    up = geometry.normal
+    right = _normalized(np.cross(forward, up))
+    center = geometry.start_pos + forward * along + up * z
+
+    corners = np.array(
+        [(x, y, h) for x in (-0.5, 0.5) for y in (-0.5, 0.5) for h in (-0.5, 0.5)]
+    ) * (width, depth, height)
+    offsets = (
+        corners[None, :, 0, None] * right[:, None]
+        + corners[None, :, 1, None] * forward[:, None]
+        + corners[None, :, 2, None] * up[:, None]
+    )
+    vertices = center[:, None] + offsets
+    normals = _normalized(offsets)
+
+    faces = np.array(
+        [
+            (0, 2, 3, 1),
+            (4, 5, 7, 6),
+            (0, 1, 5, 4),
+            (2, 6, 7, 3),
+            (0, 4, 6, 2),
+            (1, 3, 7, 5),
+        ]
+    )
+    quads = faces[None] + np.arange(len(center))[:, None, None] * 8
+    triangles = np.concatenate((quads[..., [0, 2, 1]], quads[..., [0, 3, 2]]), axis=1)
+    return vertices.reshape(-1, 3), normals.reshape(-1, 3), triangles.reshape(-1, 3)
+
+
+def collection_mesh_arrays(geometry: TrackGeometry) -> MeshArrays:
+    position, _, right, up = joint_frames(geometry)
+    parts = [_tube(position, right, up, *tube) for tube in TUBES]
+    colors = [RAIL_COLOR] * len(parts)
+    parts.append(_ties(geometry))
+    colors.append(TIE_COLOR)
+
+    vertices = np.empty(sum(len(part[0]) for part in parts), VERTEX_DTYPE)
+    triangles = []
+    offset = 0
+    for (part_vertices, part_normals, part_triangles), color in zip(parts, colors):
+        rows = vertices[offset : offset + len(part_vertices)]
+        rows["vertex"] = part_vertices
+        rows["normal"] = part_normals
+        rows["color"] = np.round(np.array(color) * 255)
+        triangles.append(part_triangles + offset)
+        offset += len(part_vertices)
+    index_type = np.uint16 if len(vertices) <= 0xFFFF else np.uint32
+    return vertices, np.concatenate(triangles).astype(index_type).ravel()
+
+
+def mesh_node(
+    vertices: np.ndarray, indices: np.ndarray, name: str = "track_mesh"
+) -> GeomNode:
+    vertex_data = GeomVertexData(name, GeomVertexFormat.getV3n3c4(), Geom.UHStatic)
+    vertex_data.unclean_set_num_rows(len(vertices))
+    memoryview(vertex_data.modify_array(0)).cast("B")[:] = vertices.tobytes()
+
+    triangles = GeomTriangles(Geom.UHStatic)
+    triangles.set_index_type(
+        Geom.NT_uint16 if indices.dtype == np.uint16 else Geom.NT_uint32
+    )
+    index_data = triangles.modify_vertices()
+    index_data.unclean_set_num_rows(len(indices))
+    memoryview(index_data).cast("B")[:] = indices.tobytes()
+
+    geom = Geom(vertex_data)
+    geom.add_primitive(triangles)
+    node = GeomNode(name)
+    node.add_geom(geom)
+    return node
+
+
+def build_collection_mesh(
+    geometry: TrackGeometry, name: str = "track_mesh"
+) -> GeomNode:
+    return mesh_node(*collection_mesh_arrays(geometry), name)
+
+
+def _geom_nodes(node_path: NodePath) -> List[GeomNode]:
+    geom_nodes = [found.node() for found in node_path.find_all_matches("**/+GeomNode")]
+    if node_path.node().is_geom_node():
+        geom_nodes.append(node_path.node())
+    return geom_nodes
+
+
+def mesh_size_bytes(node_path: NodePath) -> int:
+    total = 0
+    for geom_node in _geom_nodes(node_path):
+        for geom in geom_node.get_geoms():
+            vertex_data = geom.get_vertex_data()
+            for i in range(vertex_data.get_num_arrays()):
+                total += vertex_data.get_array(i).get_data_size_bytes()
+            for primitive in geom.get_primitives():
+                if primitive.is_indexed():
+                    total += primitive.get_vertices().get_data_size_bytes()
+    return total
+
+
+def mesh_vertex_count(node_path: NodePath) -> int:
+    return sum(
+        geom.get_vertex_data().get_num_rows()
+        for geom_node in _geom_nodes(node_path)
+        for geom in geom_node.get_geoms()
+    )
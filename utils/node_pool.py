@@ -0,0 +1,44 @@
+from typing import Callable, Dict, List
+
+from panda3d.core import NodePath
+
+
+class NodePool:
+    DEFAULT_CAP = 256
+
+    def __init__(self, factory: Callable[[], NodePath], cap: int = DEFAULT_CAP):
+        self.factory = factory
+        self.cap = cap
+        self.free: List[NodePath] = []
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+
+    def acquire(self, parent: NodePath) -> NodePath:
+        if self.free:
+            self.hits += 1
+            node_path = self.free.pop()
+        else:
+            self.misses += 1
+            node_path = self.factory()
+        node_path.reparentTo(parent)
+        return node_path
+
+    def release(self, node_path: NodePath) -> None:
+        if len(self.free) >= self.cap:
+            self.dropped += 1
+            node_path.removeNode()
+            return
+        node_path.detachNode()
+        node_path.clearTransform()
+        self.free.append(node_path)
+
+    def stats(self) -> Dict[str, float]:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "dropped": self.dropped,
+            "free": len(self.free),
+            "hit_rate": self.hits / requests if requests else 0.0,
+        }
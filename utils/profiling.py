@@ -0,0 +1,175 @@
+import csv
+import json
+import os
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from direct.gui.OnscreenText import OnscreenText
+from direct.task.Task import Task
+from direct.task.TaskManagerGlobal import taskMgr
+from panda3d.core import ClockObject, NodePath, PStatClient, PStatCollector, TextNode
+
+
+class FrameProfiler:
+    HISTORY = 1024
+
+    def __init__(self, history: int = HISTORY, pstats: bool = False):
+        self.samples: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=history)
+        )
+        self.collectors: Dict[str, PStatCollector] = {}
+        self.pstats = pstats and PStatClient.connect()
+
+    def record(self, label: str, seconds: float) -> None:
+        self.samples[label].append(seconds)
+
+    @contextmanager
+    def timed(self, label: str) -> Iterator[None]:
+        collector = self._collector(label)
+        if collector is not None:
+            collector.start()
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(label, perf_counter() - start)
+            if collector is not None:
+                collector.stop()
+
+    def wrap_task(self, label: str, func: Callable) -> Callable:
+        def task(*args, **kwargs):
+            with self.timed(label):
+                return func(*args, **kwargs)
+
+        return task
+
+    def frame_task(self, _task):
+        self.record("frame", ClockObject.getGlobalClock().dt)
+        return Task.cont
+
+    def stats(self, label: str) -> Dict[str, float]:
+        samples = np.array(self.samples[label])
+        if not len(samples):
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+        return {
+            "count": len(samples),
+            "mean": float(samples.mean()),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+            "max": float(samples.max()),
+        }
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {label: self.stats(label) for label in self.samples}
+
+    def dump(self, path: Path) -> None:
+        path = Path(path)
+        if path.suffix == ".csv":
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["label", "sample", "seconds"])
+                for label, samples in self.samples.items():
+                    writer.writerows(
+                        (label, i, seconds) for i, seconds in enumerate(samples)
+                    )
+        else:
+            path.write_text(
+                json.dumps(
+                    {
+                        "summary": self.summary(),
+                        "samples": {
+                            label: list(samples)
+                            for label, samples in self.samples.items()
+                        },
+                    },
+                    indent=2,
+                )
+            )
+
+    def _collector(self, label: str) -> Optional[PStatCollector]:
+        if not self.pstats:
+            return None
+        if label not in self.collectors:
+            self.collectors[label] = PStatCollector(f"App:{label}")
+        return self.collectors[label]
+
+
+def process_uptime() -> float:
+    try:
+        stat = Path("/proc/self/stat").read_text()
+        start_ticks = int(stat.rsplit(")", 1)[1].split()[19])
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf(
+            "SC_CLK_TCK"
+        )
+    except (OSError, AttributeError, ValueError, IndexError):
+        return 0.0
+
+
+class StartupTimer:
+    def __init__(self):
+        self.start = perf_counter() - process_uptime()
+        self.marks: List[Tuple[str, float]] = []
+
+    def mark(self, label: str) -> None:
+        self.marks.append((label, perf_counter() - self.start))
+
+    @property
+    def total(self) -> float:
+        return self.marks[-1][1] if self.marks else 0.0
+
+    def report(self) -> str:
+        lines = ["cold start", f"{'stage':<16}{'step':>10}{'total':>10}"]
+        previous = 0.0
+        for label, elapsed in self.marks:
+            lines.append(
+                f"{label:<16}{(elapsed - previous) * 1e3:>7.1f} ms"
+                f"{elapsed * 1e3:>7.1f} ms"
+            )
+            previous = elapsed
+        return "\n".join(lines)
+
+
+class ProfilerOverlay:
+    REFRESH_INTERVAL = 0.25
+
+    def __init__(self, profiler: FrameProfiler, render: NodePath):
+        self.profiler = profiler
+        self.render = render
+        self.text: Optional[OnscreenText] = None
+
+    def toggle(self) -> None:
+        if self.text is None:
+            self.text = OnscreenText(
+                pos=(-1.3, -0.5),
+                scale=0.045,
+                fg=(1, 1, 1, 1),
+                bg=(0, 0, 0, 0.5),
+                align=TextNode.ALeft,
+                mayChange=True,
+            )
+            taskMgr.doMethodLater(
+                self.REFRESH_INTERVAL, self.update_task, "ProfilerOverlayTask"
+            )
+        else:
+            taskMgr.remove("ProfilerOverlayTask")
+            self.text.destroy()
+            self.text = None
+
+    def update_task(self, task):
+        lines = [f"nodes: {self.render.countNumDescendants()}"]
+        for label, stats in sorted(self.profiler.summary().items()):
+            if stats["count"]:
+                lines.append(
+                    f"{label}: p50 {stats['p50'] * 1000:.2f}"
+                    f"  p95 {stats['p95'] * 1000:.2f}"
+                    f"  p99 {stats['p99'] * 1000:.2f} ms"
+                )
+        self.text.setText("\n".join(lines))
+        return task.again
@@ -0,0 +1,118 @@
+from collections import deque
+from typing import Callable, Deque, List, NamedTuple, Optional, Sequence
+
+from direct.task.Task import Task
+from panda3d.core import ClockObject, GraphicsEngine
+
+
+class QualityTier(NamedTuple):
+    name: str
+    bloom: str
+    visible_ahead: int
+    visible_behind: int
+
+
+QUALITY_TIERS = (
+    QualityTier("high", "small", 60, 20),
+    QualityTier("medium", "medium", 60, 20),
+    QualityTier("low", "large", 40, 15),
+    QualityTier("minimal", "off", 25, 10),
+)
+
+
+class TierChange(NamedTuple):
+    time: float
+    previous: str
+    tier: str
+    frame_time: float
+
+
+class QualityGovernor:
+    WINDOW = 90
+    PERCENTILE = 90
+    DOWNGRADE_RATIO = 1.1
+    UPGRADE_RATIO = 0.6
+    DOWNGRADE_COOLDOWN = 1.0
+    UPGRADE_COOLDOWN = 5.0
+
+    def __init__(
+        self,
+        apply: Callable[[QualityTier], None],
+        budget: float = 1 / 60,
+        tiers: Sequence[QualityTier] = QUALITY_TIERS,
+        window: int = WINDOW,
+        initial_tier: int = 0,
+        adaptive: bool = True,
+        on_change: Optional[Callable[[TierChange], None]] = None,
+    ):
+        self.apply = apply
+        self.on_change = on_change
+        self.budget = budget
+        self.tiers = tiers
+        self.adaptive = adaptive
+        self.frame_times: Deque[float] = deque(maxlen=window)
+        self.changes: List[TierChange] = []
+        self.tier_index = initial_tier
+        self.last_change = 0.0
+        self.flip_wait = 0.0
+        self.apply(self.tier)
+
+    @property
+    def tier(self) -> QualityTier:
+        return self.tiers[self.tier_index]
+
+    def reset(self) -> None:
+        self.frame_times.clear()
+        self.flip_wait = 0.0
+
+    def record(self, frame_time: float, now: float) -> Optional[TierChange]:
+        self.frame_times.append(frame_time)
+        if not self.adaptive or len(self.frame_times) < self.frame_times.maxlen:
+            return None
+
+        since_change = now - self.last_change
+        if since_change < min(self.DOWNGRADE_COOLDOWN, self.UPGRADE_COOLDOWN):
+            return None
+        frame_times = sorted(self.frame_times)
+        slow_frame = frame_times[len(frame_times) * self.PERCENTILE // 100]
+        if (
+            slow_frame > self.budget * self.DOWNGRADE_RATIO
+            and self.tier_index < len(self.tiers) - 1
+            and since_change >= self.DOWNGRADE_COOLDOWN
+        ):
+            return self.set_tier(self.tier_index + 1, now, slow_frame)
+        if (
+            slow_frame < self.budget * self.UPGRADE_RATIO
+            and self.tier_index > 0
+            and since_change >= self.UPGRADE_COOLDOWN
+        ):
+            return self.set_tier(self.tier_index - 1, now, slow_frame)
+        return None
+
+    def set_tier(
+        self, tier_index: int, now: float, frame_time: float = 0.0
+    ) -> TierChange:
+        change = TierChange(
+            now, self.tier.name, self.tiers[tier_index].name, frame_time
+        )
+        self.tier_index = tier_index
+        self.apply(self.tier)
+        self.changes.append(change)
+        self.frame_times.clear()
+        self.last_change = now
+        if self.on_change is not None:
+            self.on_change(change)
+        return change
+
+    def record_frame(
+        self, dt: float, flip_wait: float, now: float
+    ) -> Optional[TierChange]:
+        return self.record(max(dt - flip_wait, 0.0), now)
+
+    def frame_task(self, _task):
+        clock = ClockObject.getGlobalClock()
+        self.record_frame(clock.dt, self.flip_wait, clock.frame_time)
+        start = clock.getRealTime()
+        GraphicsEngine.getGlobalPtr().flipFrame()
+        self.flip_wait = clock.getRealTime() - start
+        return Task.cont
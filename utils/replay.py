@@ -0,0 +1,88 @@
+import struct
+import zlib
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from utils.simulation import Simulation
+from utils.track_generation import COLLECTION_PARTS, TrackList
+
+MAGIC = b"ICRP"
+VERSION = 3
+OVERLAP_FILTER_VERSION = 2
+RETAINED_TRACKS_VERSION = 3
+LEGACY_RETAINED_TRACKS = 100
+PREFIX = struct.Struct("<4sH")
+LEGACY_HEADER = struct.Struct("<4sHHQIIII")
+HEADER = struct.Struct("<4sHHQIIIII")
+EVENT = struct.Struct("<IB")
+
+COLLECTIONS: Tuple[str, ...] = tuple(COLLECTION_PARTS)
+COLLECTION_CODES: Dict[str, int] = {name: i for i, name in enumerate(COLLECTIONS)}
+
+
+class Replay(NamedTuple):
+    seed: int
+    events: List[Tuple[int, int]]
+    ticks: int = 0
+    score: int = 0
+    layout: int = 0
+    step_rate: int = Simulation.STEP_RATE
+    retained_tracks: int = LEGACY_RETAINED_TRACKS
+    version: int = VERSION
+
+    def record(self, tick: int, collection: str) -> None:
+        self.events.append((tick, COLLECTION_CODES[collection]))
+
+    def inputs(self) -> List[Tuple[int, str]]:
+        return [(tick, COLLECTIONS[code]) for tick, code in self.events]
+
+    def to_bytes(self) -> bytes:
+        fields = [
+            MAGIC,
+            self.version,
+            self.step_rate,
+            self.seed,
+            self.ticks,
+            self.score,
+            self.layout,
+            len(self.events),
+        ]
+        if self.version >= RETAINED_TRACKS_VERSION:
+            header = HEADER.pack(*fields, self.retained_tracks)
+        else:
+            header = LEGACY_HEADER.pack(*fields)
+        return header + b"".join(EVENT.pack(*event) for event in self.events)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Replay":
+        magic, version = PREFIX.unpack_from(data)
+        if magic != MAGIC or not 1 <= version <= VERSION:
+            raise ValueError(f"Not a version 1-{VERSION} replay")
+        if version >= RETAINED_TRACKS_VERSION:
+            header = HEADER
+            *fields, num_events, retained_tracks = HEADER.unpack_from(data)
+        else:
+            header = LEGACY_HEADER
+            *fields, num_events = LEGACY_HEADER.unpack_from(data)
+            retained_tracks = LEGACY_RETAINED_TRACKS
+        _, _, step_rate, seed, ticks, score, layout = fields
+        events = list(
+            EVENT.iter_unpack(data[header.size : header.size + num_events * EVENT.size])
+        )
+        return cls(
+            seed, events, ticks, score, layout, step_rate, retained_tracks, version
+        )
+
+    def save(self, path: Path) -> None:
+        Path(path).write_bytes(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: Path) -> "Replay":
+        return cls.from_bytes(Path(path).read_bytes())
+
+
+def layout_checksum(tracks: TrackList, checksum: int = 0) -> int:
+    tail = tracks.slot(tracks.next_index - 1)
+    return zlib.crc32((np.round(tracks.end_pos[tail], 3) + 0.0).tobytes(), checksum)
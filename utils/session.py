@@ -0,0 +1,79 @@
+from typing import Dict, Sequence
+
+from direct.gui.OnscreenImage import OnscreenImage
+from direct.showbase.Loader import Loader
+from panda3d.core import NodePath, Point3F, TextNode
+
+from utils.assets import asset_path
+from utils.track_generation import (
+    PreparedCollection,
+    TrackCollectionGenerator,
+    TrackList,
+)
+
+INITIAL_TRACKS = range(30, 41)
+INITIAL_START_POS = Point3F(0, -10, 5)
+
+
+def icon_path(collection: str) -> str:
+    return asset_path(f"assets/track_icons/{collection}_icon.png")
+
+
+class SessionResources:
+    def __init__(
+        self,
+        loader: Loader,
+        aspect2d: NodePath,
+        track_generator: TrackCollectionGenerator,
+        collections: Sequence[str],
+    ):
+        self.track_generator = track_generator
+
+        self.ambient_sound = loader.loadSfx(asset_path("assets/sfx/ambient.wav"))
+        self.ambient_sound.setVolume(0.5)
+        self.ambient_sound.setLoop(True)
+        self.place_track_sound = loader.loadSfx(asset_path("assets/sfx/place.wav"))
+        self.death_sound = loader.loadSfx(asset_path("assets/sfx/death.wav"))
+
+        self.score_node = TextNode("score_node")
+        self.score_node_path = aspect2d.attachNewNode(self.score_node)
+        self.score_node_path.set_scale(0.1)
+        self.score_node_path.set_pos((-1, 0, 0.75))
+
+        icon_bar_x = 1.33333 - 0.1 - 0.2
+        self.icons = {
+            icon_name: OnscreenImage(
+                image=icon_path(icon_name),
+                pos=(icon_bar_x, 0, ((7 - i) * 2 / 7) - 1),
+                scale=(0.15, 15, 0.15),
+            )
+            for i, icon_name in enumerate(collections, start=1)
+        }
+
+        self.initial_tracks: Dict[int, PreparedCollection] = {
+            num_tracks: self._prepare_initial_track(num_tracks)
+            for num_tracks in INITIAL_TRACKS
+        }
+        self.hide()
+
+    def reset(self) -> None:
+        self.score_node.set_text("")
+        self.score_node_path.show()
+
+    def hide(self) -> None:
+        self.ambient_sound.stop()
+        self.score_node_path.hide()
+        for icon in self.icons.values():
+            icon.hide()
+
+    def initial_track(self, num_tracks: int) -> TrackList:
+        track_list = self.track_generator.finish_prepared(
+            self.initial_tracks[num_tracks]
+        )
+        self.initial_tracks[num_tracks] = self._prepare_initial_track(num_tracks)
+        return track_list
+
+    def _prepare_initial_track(self, num_tracks: int) -> PreparedCollection:
+        return self.track_generator.prepare(
+            "straight", INITIAL_START_POS, 0, num_tracks
+        )
@@ -0,0 +1,50 @@
+class Simulation:
+    STEP_RATE = 120
+    MAX_STEPS_PER_FRAME = 240
+
+    def __init__(
+        self,
+        speed: float,
+        acceleration: float,
+        max_speed: float = 20,
+        track_length: float = 2,
+        step_rate: int = STEP_RATE,
+    ):
+        self.speed = speed
+        self.acceleration = acceleration
+        self.max_speed = max_speed
+        self.track_length = track_length
+        self.step_dt = 1 / step_rate
+
+        self.tick = 0
+        self.distance = 0.0
+        self.previous_distance = 0.0
+        self.track_index = 0
+        self.accumulator = 0.0
+
+    def advance(self, frame_dt: float) -> int:
+        self.accumulator += frame_dt
+        steps = int(self.accumulator / self.step_dt)
+        if steps > self.MAX_STEPS_PER_FRAME:
+            steps = self.MAX_STEPS_PER_FRAME
+            self.accumulator = steps * self.step_dt
+        self.accumulator -= steps * self.step_dt
+        return steps
+
+    def step(self) -> None:
+        self.previous_distance = self.distance
+        self.distance += self.speed * self.step_dt
+        if self.speed < self.max_speed:
+            self.speed += self.acceleration * self.step_dt
+        self.track_index = int(self.distance // self.track_length)
+        self.tick += 1
+
+    @property
+    def alpha(self) -> float:
+        return self.accumulator / self.step_dt
+
+    def interpolated_distance(self) -> float:
+        return (
+            self.previous_distance
+            + (self.distance - self.previous_distance) * self.alpha
+        )
@@ -0,0 +1,90 @@
+import itertools
+from typing import Dict, Iterable, Set
+
+import numpy as np
+
+CELL_BITS = 21
+CELL_OFFSET = 1 << (CELL_BITS - 1)
+CELL_STRIDES = np.array([1 << (2 * CELL_BITS), 1 << CELL_BITS, 1], dtype=np.int64)
+NEIGHBOURS = np.array(list(itertools.product((-1, 0, 1), repeat=3))) @ CELL_STRIDES
+
+
+def point_segment_distances(
+    point: np.ndarray, start: np.ndarray, end: np.ndarray
+) -> np.ndarray:
+    direction = end - start
+    t = np.clip(
+        ((point - start) * direction).sum(-1) / (direction * direction).sum(-1), 0, 1
+    )
+    return np.linalg.norm(start + direction * t[..., None] - point, axis=-1)
+
+
+def segment_distances(
+    start_a: np.ndarray, end_a: np.ndarray, start_b: np.ndarray, end_b: np.ndarray
+) -> np.ndarray:
+    d1 = end_a - start_a
+    d2 = end_b - start_b
+    r = start_a - start_b
+    a = (d1 * d1).sum(-1)
+    e = (d2 * d2).sum(-1)
+    b = (d1 * d2).sum(-1)
+    c = (d1 * r).sum(-1)
+    f = (d2 * r).sum(-1)
+    denominator = a * e - b * b
+    parallel = denominator < 1e-9
+    s = np.clip((b * f - c * e) / np.where(parallel, 1, denominator), 0, 1)
+    s = np.where(parallel, 0, s)
+    t = (b * s + f) / e
+    s = np.where(
+        t < 0, np.clip(-c / a, 0, 1), np.where(t > 1, np.clip((b - c) / a, 0, 1), s)
+    )
+    t = np.clip(t, 0, 1)
+    return np.linalg.norm(
+        start_a + d1 * s[..., None] - start_b - d2 * t[..., None], axis=-1
+    )
+
+
+class SpatialHash:
+    CELL_SIZE = 4.0
+
+    def __init__(self, cell_size: float = CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells: Dict[int, Set[int]] = {}
+        self.track_cells: Dict[int, Set[int]] = {}
+
+    def cell_keys(self, points: np.ndarray) -> np.ndarray:
+        cells = np.floor(np.asarray(points) / self.cell_size).astype(np.int64)
+        return (cells + CELL_OFFSET) @ CELL_STRIDES
+
+    def insert(
+        self, indices: Iterable[int], start_pos: np.ndarray, end_pos: np.ndarray
+    ) -> None:
+        starts = self.cell_keys(start_pos).tolist()
+        ends = self.cell_keys(end_pos).tolist()
+        for index, start, end in zip(indices, starts, ends):
+            cells = self.track_cells[index] = {start, end}
+            for cell in cells:
+                self.cells.setdefault(cell, set()).add(index)
+
+    def remove(self, index: int) -> None:
+        for cell in self.track_cells.pop(index, ()):
+            bucket = self.cells[cell]
+            bucket.discard(index)
+            if not bucket:
+                del self.cells[cell]
+
+    def near(self, points: np.ndarray) -> Set[int]:
+        cells = np.unique(self.cell_keys(points))
+        found: Set[int] = set()
+        for key in np.unique(cells[:, None] + NEIGHBOURS).tolist():
+            bucket = self.cells.get(key)
+            if bucket:
+                found |= bucket
+        return found
+
+    def clear(self) -> None:
+        self.cells.clear()
+        self.track_cells.clear()
+
+    def __len__(self):
+        return len(self.track_cells)
@@ -1,164 +1,637 @@
-from math import pi
-from typing import Optional, Literal
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import wraps
+from typing import (
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Literal,
+    Sequence,
+    Tuple,
+    Union,
+)
 import random
 
+import numpy as np
 from direct.showbase.Loader import Loader
-from panda3d.core import NodePath, Point3F, Quat, Vec3
+from panda3d.core import NodePath, Point3F, Vec3
+
+from utils.assets import asset_path
+from utils.mesh_builder import MeshArrays, collection_mesh_arrays, mesh_node
+from utils.node_pool import NodePool
+from utils.spatial_hash import (
+    SpatialHash,
+    point_segment_distances,
+    segment_distances,
+)
+from utils.track_geometry import TrackGeometry, concatenate_geometry, track_geometry
+
+
+TRACK_MESHES = ("model", "procedural")
+
+
+class TrackPart(NamedTuple):
+    num_tracks: int
+    del_pitch_deg: float
+    del_heading_deg: float
+    is_loop: bool = False
+
+
+COLLECTION_PARTS: Dict[str, Callable[[int], Tuple[TrackPart, ...]]] = {
+    "straight": lambda num_tracks: (TrackPart(num_tracks, 0, 0),),
+    "ramp_up": lambda num_tracks: (TrackPart(num_tracks, 5, 0), TrackPart(2, 0, 0)),
+    "ramp_down": lambda num_tracks: (TrackPart(num_tracks, -5, 0), TrackPart(2, 0, 0)),
+    "turn_left": lambda num_tracks: (TrackPart(num_tracks, 0, 5),),
+    "turn_right": lambda num_tracks: (TrackPart(num_tracks, 0, -5),),
+    "loop": lambda num_tracks: (
+        TrackPart(num_tracks, 10, 1, is_loop=True),
+        TrackPart(2, 0, 0),
+    ),
+}
+
+COLLECTION_LENGTHS: Dict[str, range] = {
+    "straight": range(10, 21),
+    "ramp_up": range(10, 11),
+    "ramp_down": range(10, 11),
+    "turn_left": range(18, 19),
+    "turn_right": range(18, 19),
+    "loop": range(40, 41),
+}
+MAX_COLLECTION_TRACKS = 42
 
 
 class Track:
+    __slots__ = ("track_list", "index")
+
     LENGTH = 2
 
-    def __init__(
-        self, direction: Vec3, normal: Vec3, start_pos: Point3F, node_path: NodePath
-    ):
-        self.direction = direction
-        self.normal = normal
-        self.next_track = None
-        self.start_pos = start_pos
-        self.end_pos = self.start_pos + self.direction * self.LENGTH
+    def __init__(self, track_list: "TrackList", index: int):
+        self.track_list = track_list
+        self.index = index
+
+    @property
+    def start_pos(self) -> Point3F:
+        return Point3F(
+            *self.track_list.start_pos[self.track_list.slot(self.index)].tolist()
+        )
+
+    @property
+    def end_pos(self) -> Point3F:
+        return Point3F(
+            *self.track_list.end_pos[self.track_list.slot(self.index)].tolist()
+        )
+
+    @property
+    def direction(self) -> Vec3:
+        return Vec3(
+            *self.track_list.direction[self.track_list.slot(self.index)].tolist()
+        )
+
+    @property
+    def normal(self) -> Vec3:
+        return Vec3(*self.track_list.normal[self.track_list.slot(self.index)].tolist())
+
+    @property
+    def node_path(self) -> Optional[NodePath]:
+        return self.track_list.node_paths[self.track_list.slot(self.index)]
+
+    @node_path.setter
+    def node_path(self, node_path: Optional[NodePath]) -> None:
+        self.track_list.node_paths[self.track_list.slot(self.index)] = node_path
+
+    @property
+    def batch(self) -> Optional["TrackBatch"]:
+        return self.track_list.batches[self.track_list.slot(self.index)]
+
+    @batch.setter
+    def batch(self, batch: Optional["TrackBatch"]) -> None:
+        self.track_list.batches[self.track_list.slot(self.index)] = batch
+
+    @property
+    def next_track(self) -> Optional["Track"]:
+        return self.track_list.get(self.index + 1)
+
+
+class TrackBatch:
+    def __init__(self, node_path: NodePath, num_tracks: int):
         self.node_path = node_path
+        self.remaining = num_tracks
+
+    def release(self) -> None:
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.node_path.remove_node()
+
+
+class TrackArrays(NamedTuple):
+    start_pos: np.ndarray
+    end_pos: np.ndarray
+    direction: np.ndarray
+    normal: np.ndarray
 
 
 class TrackList:
+    DEFAULT_CAPACITY = 64
+
     def __init__(
         self,
-        head: Optional[Track] = None,
-        tail: Optional[Track] = None,
         maxlen: Optional[int] = None,
+        capacity: Optional[int] = None,
+        node_pool: Optional[NodePool] = None,
+        spatial_index: Optional[SpatialHash] = None,
     ):
         self.maxlen = maxlen
+        self.node_pool = node_pool
+        self.spatial_index = spatial_index
+        if maxlen is not None:
+            capacity = maxlen
+        self._allocate(capacity or self.DEFAULT_CAPACITY)
+        self.first_index = 0
         self._len = 0
-        self.head = head
-        self.tail = tail
 
-    def append(self, track: Track) -> None:
+    def _allocate(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.start_pos = np.zeros((capacity, 3))
+        self.end_pos = np.zeros((capacity, 3))
+        self.direction = np.zeros((capacity, 3))
+        self.normal = np.zeros((capacity, 3))
+        self.node_paths = np.full(capacity, None, dtype=object)
+        self.batches = np.full(capacity, None, dtype=object)
+
+    @classmethod
+    def from_geometry(
+        cls, geometry: TrackGeometry, node_paths: Sequence[Optional[NodePath]]
+    ) -> "TrackList":
+        track_list = cls(capacity=max(len(node_paths), 1))
+        track_list._len = len(node_paths)
+        track_list.start_pos[: len(node_paths)] = geometry.start_pos
+        track_list.end_pos[: len(node_paths)] = geometry.end_pos
+        track_list.direction[: len(node_paths)] = geometry.direction
+        track_list.normal[: len(node_paths)] = geometry.normal
+        track_list.node_paths[: len(node_paths)] = node_paths
+        return track_list
+
+    @property
+    def next_index(self) -> int:
+        return self.first_index + self._len
+
+    @property
+    def end_distance(self) -> float:
+        return self.arc_length(self.next_index)
+
+    @staticmethod
+    def arc_length(index: int) -> float:
+        return index * Track.LENGTH
+
+    def locate(self, distance: float) -> Tuple[int, float]:
+        index = int(distance // Track.LENGTH)
+        return index, distance - self.arc_length(index)
+
+    def position_at(self, distance: float) -> Point3F:
+        index, offset = self.locate(distance)
+        slot = self.slot(index)
+        return (
+            Point3F(*self.start_pos[slot].tolist())
+            + Vec3(*self.direction[slot].tolist()) * offset
+        )
+
+    @property
+    def head(self) -> Optional[Track]:
+        return Track(self, self.first_index) if self._len else None
+
+    @property
+    def tail(self) -> Optional[Track]:
+        return Track(self, self.next_index - 1) if self._len else None
+
+    def slot(self, index: int) -> int:
+        if not self.first_index <= index < self.next_index:
+            raise IndexError(f"Track {index} is not in the track list")
+        return index % self.capacity
+
+    def slots(self, start: int, stop: int) -> np.ndarray:
+        return np.arange(start, stop) % self.capacity
+
+    def get(self, index: int) -> Optional[Track]:
+        if self.first_index <= index < self.next_index:
+            return Track(self, index)
+        return None
+
+    def append(
+        self,
+        start_pos: Point3F,
+        direction: Vec3,
+        normal: Vec3,
+        node_path: Optional[NodePath] = None,
+    ) -> None:
+        self._reserve(1)
+        slot = self.next_index % self.capacity
+        self.start_pos[slot] = tuple(start_pos)
+        self.direction[slot] = tuple(direction)
+        self.end_pos[slot] = tuple(start_pos + direction * Track.LENGTH)
+        self.normal[slot] = tuple(normal)
+        self.node_paths[slot] = node_path
+        if self.spatial_index is not None:
+            self.spatial_index.insert(
+                (self.next_index,), self.start_pos[[slot]], self.end_pos[[slot]]
+            )
         self._len += 1
-        if self.tail:
-            self.tail.next_track = track
-        track.next_track = None
-        self.tail = track
-        if self.head is None:
-            self.head = track
-        if self.maxlen is not None and len(self) > self.maxlen:
-            self.popleft()
 
     def extend(self, other: "TrackList") -> None:
-        self._len += len(other)
-        if self.tail:
-            self.tail.next_track = other.head
-        if self.head is None:
-            self.head = other.head
-        self.tail = other.tail
-        while self.maxlen is not None and len(self) > self.maxlen:
-            self.popleft()
+        num_tracks = len(other)
+        if self.maxlen is not None and num_tracks > self.maxlen:
+            while len(other) > self.maxlen:
+                other.popleft()
+            num_tracks = len(other)
+        self._reserve(num_tracks)
+
+        source = other.slots(other.first_index, other.next_index)
+        target = self.slots(self.next_index, self.next_index + num_tracks)
+        self.start_pos[target] = other.start_pos[source]
+        self.end_pos[target] = other.end_pos[source]
+        self.direction[target] = other.direction[source]
+        self.normal[target] = other.normal[source]
+        self.node_paths[target] = other.node_paths[source]
+        self.batches[target] = other.batches[source]
+        if self.spatial_index is not None:
+            self.spatial_index.insert(
+                range(self.next_index, self.next_index + num_tracks),
+                self.start_pos[target],
+                self.end_pos[target],
+            )
+        self._len += num_tracks
+
+        other.node_paths[source] = None
+        other.batches[source] = None
+        other.first_index = other.next_index
+        other._len = 0
+
+    def _reserve(self, num_tracks: int) -> None:
+        if self.maxlen is not None:
+            while len(self) + num_tracks > self.maxlen:
+                self.popleft()
+        elif len(self) + num_tracks > self.capacity:
+            capacity = self.capacity
+            while len(self) + num_tracks > capacity:
+                capacity *= 2
+            source = self.slots(self.first_index, self.next_index)
+            old = self[self.first_index : self.next_index]
+            node_paths = self.node_paths[source]
+            batches = self.batches[source]
+
+            self._allocate(capacity)
+            target = self.slots(self.first_index, self.next_index)
+            self.start_pos[target] = old.start_pos
+            self.end_pos[target] = old.end_pos
+            self.direction[target] = old.direction
+            self.normal[target] = old.normal
+            self.node_paths[target] = node_paths
+            self.batches[target] = batches
 
     def popleft(self) -> None:
-        if self.head is None:
+        if not self._len:
             raise IndexError("Empty track list")
+        slot = self.first_index % self.capacity
+        batch = self.batches[slot]
+        if batch is not None:
+            batch.release()
+        elif self.node_paths[slot] is not None:
+            if self.node_pool is not None:
+                self.node_pool.release(self.node_paths[slot])
+            else:
+                self.node_paths[slot].remove_node()
+        self.node_paths[slot] = None
+        self.batches[slot] = None
+        if self.spatial_index is not None:
+            self.spatial_index.remove(self.first_index)
+        self.first_index += 1
         self._len -= 1
-        head = self.head
-        self.head = self.head.next_track
-        head.node_path.remove_node()
+
+    def clear(self) -> None:
+        while self._len:
+            self.popleft()
+
+    def nearest(self, point: Point3F) -> Optional[Tuple[int, float]]:
+        point = np.array(tuple(point))
+        indices = np.fromiter(self.spatial_index.near(point), dtype=np.int64)
+        if not len(indices):
+            return None
+        slots = indices % self.capacity
+        distances = point_segment_distances(
+            point, self.start_pos[slots], self.end_pos[slots]
+        )
+        nearest = distances.argmin()
+        return int(indices[nearest]), float(distances[nearest])
+
+    def overlaps(
+        self,
+        start_pos: np.ndarray,
+        end_pos: np.ndarray,
+        clearance: float,
+        start: int,
+        stop: int,
+    ) -> bool:
+        indices = np.fromiter(
+            self.spatial_index.near(np.concatenate((start_pos, end_pos))),
+            dtype=np.int64,
+        )
+        indices = indices[(indices >= start) & (indices < stop)]
+        if not len(indices):
+            return False
+        slots = indices % self.capacity
+        distances = segment_distances(
+            start_pos[:, None],
+            end_pos[:, None],
+            self.start_pos[slots][None],
+            self.end_pos[slots][None],
+        )
+        return bool((distances < clearance).any())
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Track, TrackArrays]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.next_index)
+            slots = self.slots(max(start, self.first_index), stop)[::step]
+            return TrackArrays(
+                self.start_pos[slots],
+                self.end_pos[slots],
+                self.direction[slots],
+                self.normal[slots],
+            )
+        self.slot(index)
+        return Track(self, index)
 
     def __iter__(self):
-        current = self.head
-        while current is not None:
-            yield current
-            current = current.next_track
+        for index in range(self.first_index, self.next_index):
+            yield Track(self, index)
 
     def __len__(self):
         return self._len
 
 
+def batched_collection(generate: Callable[..., TrackList]) -> Callable[..., TrackList]:
+    @wraps(generate)
+    def wrapper(self: "TrackCollectionGenerator", *args, **kwargs) -> TrackList:
+        track_list = generate(self, *args, **kwargs)
+        if self.batch_collections and not self.procedural_mesh:
+            self._batch(track_list)
+        return track_list
+
+    return wrapper
+
+
 class TrackCollectionGenerator:
-    def __init__(self, render: NodePath, loader: Loader):
+    def __init__(
+        self,
+        render: NodePath,
+        loader: Loader,
+        batch_collections: bool = False,
+        use_templates: bool = True,
+        rng: Optional[random.Random] = None,
+        node_pool_cap: int = NodePool.DEFAULT_CAP,
+        procedural_mesh: bool = False,
+    ):
         self.render = render
         self.loader = loader
-        self.total_tracks_placed = 0
+        self.rng = rng or random.Random()
+        self.batch_collections = batch_collections
+        self.use_templates = use_templates
+        self.procedural_mesh = procedural_mesh
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="track_geometry"
+        )
+        self.prepared_root = self.render.attachNewNode("prepared_tracks")
+        self.prepared_root.stash()
+
+        self.track_model = self.loader.loadModel(
+            asset_path("assets/models/trackcoloured.bam")
+        )
+        self.track_model.find_all_matches("**/+LensNode").detach()
+        self.track_model.setColor((0, 0, 0, 1))
+        self.track_model.set_pos(0, Track.LENGTH / 2, 0)
+        self.node_pool = NodePool(self._new_track_node, node_pool_cap)
+
+        self.templates: Dict[Tuple[str, float, int], TrackGeometry] = {}
+        if self.use_templates:
+            self.precompute_templates()
+
+    def collection_template(
+        self, collection: str, initial_heading: float, num_tracks: int
+    ) -> TrackGeometry:
+        key = (collection, initial_heading % 360, num_tracks)
+        template = self.templates.get(key)
+        if template is None:
+            template = self.templates[key] = self._compute_geometry(
+                collection, (0, 0, 0), initial_heading, num_tracks
+            )
+        return template
+
+    def precompute_templates(self) -> None:
+        for initial_heading in (0, 90, 180, 270):
+            for collection, lengths in COLLECTION_LENGTHS.items():
+                for num_tracks in lengths:
+                    self.collection_template(collection, initial_heading, num_tracks)
+
+    def collection_length(self, collection: str) -> int:
+        lengths = COLLECTION_LENGTHS[collection]
+        if len(lengths) == 1:
+            return lengths[0]
+        return self.rng.randint(lengths[0], lengths[-1])
+
+    def collection_geometry(
+        self,
+        collection: str,
+        start_pos: Point3F,
+        initial_heading: float,
+        num_tracks: int,
+    ) -> TrackGeometry:
+        if self.use_templates:
+            return self.collection_template(
+                collection, initial_heading, num_tracks
+            ).translated(start_pos)
+        return self._compute_geometry(
+            collection, start_pos, initial_heading, num_tracks
+        )
 
-    def _generate_track_collection(
+    def _compute_geometry(
         self,
+        collection: str,
+        start_pos: Sequence[float],
+        initial_heading: float,
         num_tracks: int,
+    ) -> TrackGeometry:
+        parts = []
+        for part in COLLECTION_PARTS[collection](num_tracks):
+            parts.append(
+                track_geometry(
+                    **part._asdict(),
+                    initial_heading=initial_heading,
+                    start_pos=start_pos,
+                    length=Track.LENGTH,
+                )
+            )
+            start_pos = parts[-1].end_pos[-1]
+        return concatenate_geometry(parts)
+
+    def _generate_collection(
+        self,
+        collection: str,
         start_pos: Point3F,
-        del_pitch_deg: float,
-        del_heading_deg: float,
         initial_heading: float,
-        is_loop: bool = False,
+        num_tracks: int,
     ) -> TrackList:
+        geometry = self.collection_geometry(
+            collection, start_pos, initial_heading, num_tracks
+        )
+        if self.procedural_mesh:
+            return self._build_mesh(geometry)
+        return TrackList.from_geometry(
+            geometry, self._build_nodes(geometry, 0, len(geometry.start_pos))
+        )
 
-        pitch_deg = 0
-        pitch = pitch_deg * pi / 180
-        heading_deg = initial_heading % 360
-        heading = heading_deg * pi / 180
-
-        del_pitch = del_pitch_deg * pi / 180
-        del_heading = del_heading_deg * pi / 180
-
-        track_list = TrackList()
-
-        normal_rotation_quat = Quat()
-        normal_rotation_quat.setFromAxisAngleRad(
-            del_pitch,
-            {
-                0.0: Vec3(1, 0, 0),
-                90.0: Vec3(0, 1, 0),
-                180.0: Vec3(-1, 0, 0),
-                270.0: Vec3(0, -1, 0),
-            }[heading_deg],
-        )
-        track_normal = Vec3(0, 0, 1)
-
-        for i in range(num_tracks):
-            self.total_tracks_placed += 1
-            track_dummy_node = NodePath("track_dummy_node")
-            track_dummy_node.reparentTo(self.render)
-
-            track = self.loader.loadModel("assets/models/trackcoloured.bam")
-            track.reparentTo(track_dummy_node)
-            track.setColor((0, 0, 0, 1))
-            track.set_pos(0, Track.LENGTH / 2, 0)
-
-            track_dummy_node.set_pos(start_pos)
-            track_dummy_node.set_h(heading_deg)
-            track_dummy_node.set_p(pitch_deg)
-
-            track_direction = Vec3(
-                track.getPos(self.render) - track_dummy_node.getPos(self.render)
-            ).normalized()
-            track_list.append(
-                Track(
-                    track_direction,
-                    track_normal,
-                    track_dummy_node.getPos(self.render),
-                    track_dummy_node,
-                )
+    def prepare(
+        self,
+        collection: str,
+        start_pos: Point3F,
+        initial_heading: float,
+        num_tracks: int,
+    ) -> "PreparedCollection":
+        geometry = self.executor.submit(
+            self.collection_geometry,
+            collection,
+            Point3F(start_pos),
+            initial_heading,
+            num_tracks,
+        )
+        mesh = None
+        if self.procedural_mesh:
+            mesh = self.executor.submit(
+                lambda: collection_mesh_arrays(geometry.result())
+            )
+        return PreparedCollection(
+            collection, geometry, self.prepared_root.attachNewNode(collection), mesh
+        )
+
+    def build_prepared(self, prepared: "PreparedCollection", max_tracks: int) -> int:
+        if prepared.track_list is not None or not prepared.geometry.done():
+            return 0
+        geometry = prepared.geometry.result()
+        if prepared.mesh is not None:
+            if not prepared.mesh.done():
+                return 0
+            prepared.track_list = self._build_mesh(
+                geometry, prepared.root, prepared.mesh.result()
             )
+            return len(geometry.start_pos)
+        start = len(prepared.node_paths)
+        stop = min(start + max_tracks, len(geometry.start_pos))
+        prepared.node_paths.extend(
+            self._build_nodes(geometry, start, stop, prepared.root)
+        )
+        if stop == len(geometry.start_pos):
+            prepared.track_list = TrackList.from_geometry(geometry, prepared.node_paths)
+            if self.batch_collections:
+                self._batch(prepared.track_list, prepared.root)
+        return stop - start
 
-            start_pos = start_pos + track_direction * Track.LENGTH
-            track_normal = normal_rotation_quat.xform(track_normal)
-            pitch_deg += del_pitch_deg
-            pitch += del_pitch
-            if not is_loop or i < num_tracks // 2:
-                heading_deg += del_heading_deg
-                heading += del_heading
-            else:
-                heading_deg -= del_heading_deg
-                heading -= del_heading
+    def finish_prepared(self, prepared: "PreparedCollection") -> TrackList:
+        if prepared.track_list is None:
+            if prepared.mesh is not None:
+                prepared.mesh.result()
+            self.build_prepared(prepared, len(prepared.geometry.result().start_pos))
+        prepared.root.getChildren().reparentTo(self.render)
+        prepared.root.removeNode()
+        return prepared.track_list
 
+    def discard_prepared(self, prepared: "PreparedCollection") -> None:
+        prepared.geometry.cancel()
+        if prepared.mesh is not None:
+            prepared.mesh.cancel()
+        if prepared.track_list is None or not self.batch_collections:
+            for node_path in prepared.node_paths:
+                self.node_pool.release(node_path)
+        prepared.root.removeNode()
+
+    def _batch(self, track_list: TrackList, parent: Optional[NodePath] = None) -> None:
+        batch_node = (parent or self.render).attachNewNode("track_batch")
+        for track in track_list:
+            track.node_path.reparentTo(batch_node)
+        batch_node.clearModelNodes()
+        batch_node.flattenStrong()
+
+        batch = TrackBatch(batch_node, len(track_list))
+        for track in track_list:
+            track.node_path = batch_node
+            track.batch = batch
+
+    def _build_mesh(
+        self,
+        geometry: TrackGeometry,
+        parent: Optional[NodePath] = None,
+        mesh_arrays: Optional[MeshArrays] = None,
+    ) -> TrackList:
+        if mesh_arrays is None:
+            mesh_arrays = collection_mesh_arrays(geometry)
+        mesh_path = (parent or self.render).attachNewNode(mesh_node(*mesh_arrays))
+        num_tracks = len(geometry.start_pos)
+        track_list = TrackList.from_geometry(geometry, [mesh_path] * num_tracks)
+        track_list.batches[:num_tracks] = TrackBatch(mesh_path, num_tracks)
         return track_list
 
+    def _build_nodes(
+        self,
+        geometry: TrackGeometry,
+        start: int,
+        stop: int,
+        parent: Optional[NodePath] = None,
+    ) -> List[NodePath]:
+        node_paths = []
+        for start_pos, heading, pitch in zip(
+            geometry.start_pos[start:stop].tolist(),
+            geometry.heading[start:stop].tolist(),
+            geometry.pitch[start:stop].tolist(),
+        ):
+            track_dummy_node = self.node_pool.acquire(parent or self.render)
+            track_dummy_node.set_pos_hpr(*start_pos, heading, pitch, 0)
+            node_paths.append(track_dummy_node)
+        return node_paths
+
+    def _new_track_node(self) -> NodePath:
+        track_dummy_node = NodePath("track_dummy_node")
+        if self.batch_collections:
+            self.track_model.copyTo(track_dummy_node)
+        else:
+            self.track_model.instanceTo(track_dummy_node)
+        return track_dummy_node
+
+    @batched_collection
+    def generate_collection(
+        self,
+        collection: str,
+        start_pos: Point3F,
+        initial_heading: float,
+        num_tracks: Optional[int] = None,
+    ) -> TrackList:
+        if num_tracks is None:
+            num_tracks = self.collection_length(collection)
+        return self._generate_collection(
+            collection,
+            start_pos=start_pos,
+            initial_heading=initial_heading,
+            num_tracks=num_tracks,
+        )
+
+    @batched_collection
     def generate_straight(
         self, start_pos: Point3F, initial_heading: float, num_tracks: int = 10
     ) -> TrackList:
-        return self._generate_track_collection(
+        return self._generate_collection(
+            "straight",
             start_pos=start_pos,
             initial_heading=initial_heading,
-            num_tracks=random.randint(num_tracks, num_tracks + 10),
-            del_pitch_deg=0,
-            del_heading_deg=0,
+            num_tracks=self.rng.randint(num_tracks, num_tracks + 10),
         )
 
+    @batched_collection
     def generate_ramp(
         self,
         start_pos: Point3F,
@@ -166,56 +639,50 @@ class TrackCollectionGenerator:
         type_: Literal["up", "down"],
         num_tracks: int = 10,
     ) -> TrackList:
-        ramp = self._generate_track_collection(
+        return self._generate_collection(
+            f"ramp_{type_}",
             start_pos=start_pos,
             initial_heading=initial_heading,
             num_tracks=num_tracks,
-            del_pitch_deg=5 if type_ == "up" else -5,
-            del_heading_deg=0,
-        )
-        ramp.extend(
-            self._generate_track_collection(
-                start_pos=ramp.tail.end_pos,
-                initial_heading=initial_heading,
-                num_tracks=2,
-                del_pitch_deg=0,
-                del_heading_deg=0,
-            )
         )
-        return ramp
 
+    @batched_collection
     def generate_turn(
         self,
         start_pos: Point3F,
         initial_heading: float,
         type_: Literal["left", "right"],
     ) -> TrackList:
-        return self._generate_track_collection(
+        return self._generate_collection(
+            f"turn_{type_}",
             start_pos=start_pos,
             initial_heading=initial_heading,
             num_tracks=18,
-            del_pitch_deg=0,
-            del_heading_deg=5 if type_ == "left" else -5,
         )
 
+    @batched_collection
     def generate_loop(
         self, start_pos: Point3F, initial_heading: float, num_tracks: int = 40
     ) -> TrackList:
-        loop = self._generate_track_collection(
+        return self._generate_collection(
+            "loop",
             start_pos=start_pos,
             initial_heading=initial_heading,
             num_tracks=num_tracks,
-            del_pitch_deg=10,
-            del_heading_deg=1,
-            is_loop=True,
-        )
-        loop.extend(
-            self._generate_track_collection(
-                start_pos=loop.tail.end_pos,
-                initial_heading=initial_heading,
-                num_tracks=2,
-                del_pitch_deg=0,
-                del_heading_deg=0,
-            )
         )
-        return loop
+
+
+class PreparedCollection:
+    def __init__(
+        self,
+        collection: str,
+        geometry: "Future[TrackGeometry]",
+        root: NodePath,
+        mesh: Optional["Future[MeshArrays]"] = None,
+    ):
+        self.collection = collection
+        self.geometry = geometry
+        self.root = root
+        self.mesh = mesh
+        self.node_paths: List[NodePath] = []
+        self.track_list: Optional[TrackList] = None
@@ -0,0 +1,70 @@
+from typing import Dict, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+PITCH_AXES: Dict[float, Tuple[float, float, float]] = {
+    0.0: (1, 0, 0),
+    90.0: (0, 1, 0),
+    180.0: (-1, 0, 0),
+    270.0: (0, -1, 0),
+}
+
+
+class TrackGeometry(NamedTuple):
+    start_pos: np.ndarray
+    end_pos: np.ndarray
+    direction: np.ndarray
+    normal: np.ndarray
+    heading: np.ndarray
+    pitch: np.ndarray
+
+    def translated(self, offset: Sequence[float]) -> "TrackGeometry":
+        return self._replace(
+            start_pos=self.start_pos + offset, end_pos=self.end_pos + offset
+        )
+
+
+def track_geometry(
+    num_tracks: int,
+    del_pitch_deg: float,
+    del_heading_deg: float,
+    initial_heading: float,
+    is_loop: bool = False,
+    start_pos: Sequence[float] = (0, 0, 0),
+    length: float = 2,
+) -> TrackGeometry:
+    steps = np.arange(num_tracks)
+
+    if is_loop:
+        turns = np.where(steps < num_tracks // 2, 1, -1)
+        heading_steps = np.concatenate(([0], np.cumsum(turns[:-1])))
+    else:
+        heading_steps = steps
+    heading_deg = initial_heading % 360 + heading_steps * del_heading_deg
+    pitch_deg = steps * del_pitch_deg
+
+    heading = np.radians(heading_deg)
+    pitch = np.radians(pitch_deg)
+    cos_pitch = np.cos(pitch)
+    direction = np.column_stack(
+        (-np.sin(heading) * cos_pitch, np.cos(heading) * cos_pitch, np.sin(pitch))
+    )
+
+    end = np.cumsum(direction * length, axis=0)
+    end += start_pos
+    start = np.empty_like(end)
+    start[:1] = start_pos
+    start[1:] = end[:-1]
+
+    axis_x, axis_y, _ = PITCH_AXES[initial_heading % 360]
+    normal_angle = steps * np.radians(del_pitch_deg)
+    sin_normal = np.sin(normal_angle)
+    normal = np.column_stack(
+        (axis_y * sin_normal, -axis_x * sin_normal, np.cos(normal_angle))
+    )
+
+    return TrackGeometry(start, end, direction, normal, heading_deg, pitch_deg)
+
+
+def concatenate_geometry(parts: Sequence[TrackGeometry]) -> TrackGeometry:
+    return TrackGeometry(*(np.concatenate(field) for field in zip(*parts)))
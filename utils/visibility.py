@@ -0,0 +1,53 @@
+from typing import Optional, Set
+
+from panda3d.core import NodePath
+
+from utils.track_generation import TrackList
+
+
+class TrackVisibility:
+    AHEAD = 60
+    BEHIND = 20
+
+    def __init__(self, tracks: TrackList, ahead: int = AHEAD, behind: int = BEHIND):
+        self.tracks = tracks
+        self.ahead = ahead
+        self.behind = behind
+        self.current_index: Optional[int] = None
+        self.next_index = tracks.first_index
+        self.visible: Set[NodePath] = set()
+
+    def resize(self, ahead: int, behind: int) -> None:
+        self.ahead = ahead
+        self.behind = behind
+        self.current_index = None
+
+    def update(self, current_index: int) -> bool:
+        if (
+            current_index == self.current_index
+            and self.tracks.next_index == self.next_index
+        ):
+            return False
+
+        start = max(current_index - self.behind, self.tracks.first_index)
+        stop = min(current_index + self.ahead, self.tracks.next_index)
+        visible = set(self.tracks.node_paths[self.tracks.slots(start, stop)].tolist())
+        visible.discard(None)
+
+        for node_path in self.visible - visible:
+            if node_path.hasParent():
+                node_path.stash()
+        for node_path in visible - self.visible:
+            node_path.unstash()
+
+        added = self.tracks.slots(
+            max(self.next_index, self.tracks.first_index), self.tracks.next_index
+        )
+        for node_path in set(self.tracks.node_paths[added].tolist()):
+            if node_path is not None and node_path not in visible:
+                node_path.stash()
+
+        self.visible = visible
+        self.current_index = current_index
+        self.next_index = self.tracks.next_index
+        return True